@@ -1,8 +1,89 @@
-from django.contrib import admin
-from .models import Attachee
+import tempfile
+
+from django.contrib import admin, messages
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from .batch import iter_zip, write_card_sheets, write_pdf
+from .jobs import queue_job
+from .models import Attachee, BackgroundJob, GeneratedDocument, OutboundEmail
+from .search import search_attachees
+
+# Selections above this many attachees are rendered by the run_jobs worker
+INLINE_DOCUMENT_LIMIT = 25
 
 @admin.register(Attachee)
 class AttacheeAdmin(admin.ModelAdmin):
     list_display = ('first_name', 'last_name', 'email', 'status', 'created_at')
+    list_filter = ('status', 'institution', 'start_date', 'end_date')
+    search_fields = ('first_name', 'last_name', 'email')
+    actions = ['download_documents_pdf', 'download_documents_zip', 'print_id_cards']
+
+    def get_search_results(self, request, queryset, search_term):
+        """Searches through the FTS5 index, best matches first"""
+        if not search_term:
+            return queryset, False
+        ranked = 'o' not in request.GET  # keep the admin's column sorting when chosen
+        return search_attachees(queryset, search_term, ranked=ranked), False
+
+    # The actions generate the documents of each selected attachee's current
+    # stage. Small selections are rendered in the request, in this process;
+    # larger ones go to the run_jobs worker and are downloaded from the dashboard.
+
+    def _documents(self, request, queryset, fmt):
+        attachees = queryset.order_by('institution', 'last_name', 'first_name', 'id')
+        ids = list(attachees.values_list('id', flat=True))
+        if len(ids) > INLINE_DOCUMENT_LIMIT:
+            job = queue_job('documents', request.user, {'ids': ids, 'format': fmt})
+            self.message_user(
+                request,
+                f"Documents for {len(ids)} attachees queued as job #{job.pk}. "
+                "Its progress and download link are on the dashboard.",
+                messages.INFO,
+            )
+            return None
+
+        date = timezone.now().date()
+        if fmt == 'zip':
+            response = StreamingHttpResponse(iter_zip(attachees, workers=1), content_type='application/zip')
+            response['Content-Disposition'] = f'attachment; filename="Documents_{date}.zip"'
+            return response
+        out = tempfile.TemporaryFile()
+        if fmt == 'cards':
+            write_card_sheets(out, attachees, workers=1)
+            filename = f"ID_Cards_{date}.pdf"
+        else:
+            write_pdf(out, attachees, workers=1)
+            filename = f"Documents_{date}.pdf"
+        out.seek(0)
+        return FileResponse(out, as_attachment=True, content_type='application/pdf', filename=filename)
+
+    @admin.action(description="Download stage documents as one PDF")
+    def download_documents_pdf(self, request, queryset):
+        return self._documents(request, queryset, 'pdf')
+
+    @admin.action(description="Download stage documents as a ZIP")
+    def download_documents_zip(self, request, queryset):
+        return self._documents(request, queryset, 'zip')
+
+    @admin.action(description="Print ID cards (10 per A4 sheet)")
+    def print_id_cards(self, request, queryset):
+        return self._documents(request, queryset, 'cards')
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipients', 'status', 'attempts', 'next_attempt_at', 'sent_at')
     list_filter = ('status',)
-    search_fields = ('first_name', 'last_name', 'email')
\ No newline at end of file
+    search_fields = ('subject', 'recipients')
+    readonly_fields = ('created_at', 'sent_at', 'claimed_at', 'last_error')
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'progress', 'total', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('started_at', 'finished_at')
+
+@admin.register(GeneratedDocument)
+class GeneratedDocumentAdmin(admin.ModelAdmin):
+    list_display = ('attachee', 'kind', 'rendered_at')
+    list_filter = ('kind',)
+    readonly_fields = ('fingerprint', 'rendered_at')
@@ -0,0 +1,162 @@
+import io
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from pypdf import PdfReader, PdfWriter
+
+from .doc_cache import open_document
+from .documents import (
+    CARDS_PER_SHEET, DOCUMENTS, STAGE_DOCUMENTS, document_filename, render_card_sheets,
+    render_documents,
+)
+from .jobs import init_worker
+from .models import Attachee
+
+# Attachees handed to a worker at a time
+CHUNK_SIZE = 25
+DEFAULT_STATUSES = ('In-Progress', 'Completed')
+# Sheets of ID cards handed to a worker at a time
+SHEETS_PER_CHUNK = 5
+FORMATS = ('pdf', 'zip', 'cards')
+
+
+def cohort_attachees(statuses=DEFAULT_STATUSES, institution='', date_from=None, date_to=None):
+    """Attachees whose attachment falls within [date_from, date_to], optionally by status and institution"""
+    attachees = Attachee.objects.all()
+    if statuses:
+        attachees = attachees.filter(status__in=statuses)
+    if institution:
+        attachees = attachees.filter(institution__iexact=institution)
+    if date_from:
+        attachees = attachees.filter(start_date__gte=date_from)
+    if date_to:
+        attachees = attachees.filter(end_date__lte=date_to)
+    return attachees.order_by('institution', 'last_name', 'first_name', 'id')
+
+
+def documents_for(attachee, kinds=None):
+    """The requested kinds, or by default the documents of the attachee's current stage"""
+    return [kind for kind in (kinds or STAGE_DOCUMENTS.get(attachee.status, ())) if kind in DOCUMENTS]
+
+
+def _load(ids):
+    attachees = Attachee.objects.in_bulk(ids)
+    return [attachees[pk] for pk in ids if pk in attachees]
+
+
+def render_pdf_chunk(ids, kinds=None):
+    """Worker: every document of a chunk of attachees as one PDF (or None if there are none)"""
+    items = [(kind, a) for a in _load(ids) for kind in documents_for(a, kinds)]
+    return render_documents(items) if items else None
+
+
+def render_file_chunk(ids, kinds=None):
+    """Worker: [(filename, PDF bytes)] for a chunk of attachees, through the render cache"""
+    files = []
+    for attachee in _load(ids):
+        for kind in documents_for(attachee, kinds):
+            with open_document(kind, attachee) as fh:
+                files.append((document_filename(kind, attachee), fh.read()))
+    return files
+
+
+def render_sheet_chunk(ids, kinds=None):
+    """Worker: ID card sheets for a chunk of attachees as one PDF"""
+    return render_card_sheets(_load(ids))
+
+
+def _chunks(ids, size):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def default_workers():
+    """Process pool size for `manage.py generate_documents`"""
+    return getattr(settings, 'DOCUMENT_BATCH_WORKERS', None) or os.cpu_count()
+
+
+def render_chunks(worker, queryset, kinds=None, workers=None, chunk_size=CHUNK_SIZE):
+    """Runs worker over the queryset in chunks; yields results in order.
+
+    Chunks are rendered in this process unless workers > 1 asks for a
+    process pool, which only the generate_documents command does: web
+    requests and run_jobs workers must not fork children of their own.
+    """
+    ids = list(queryset.values_list('id', flat=True))
+    workers = workers or 1
+    chunks = list(_chunks(ids, chunk_size))
+    if workers < 2 or len(chunks) < 2:
+        for chunk in chunks:
+            yield worker(chunk, kinds)
+        return
+
+    # Forked children must open their own database connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=init_worker) as pool:
+        yield from pool.map(worker, chunks, [kinds] * len(chunks))
+
+
+def _merge(out, parts):
+    merged = PdfWriter()
+    for data in parts:
+        if data:
+            merged.append(PdfReader(io.BytesIO(data)))
+    # Each chunk carries its own copy of the shared artwork; keep just one
+    merged.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+    merged.write(out)
+    return len(merged.pages)
+
+
+def write_pdf(out, queryset, kinds=None, workers=None):
+    """Writes every selected document into out as one merged PDF; returns the page count"""
+    return _merge(out, render_chunks(render_pdf_chunk, queryset, kinds, workers))
+
+
+def write_card_sheets(out, queryset, workers=None):
+    """Writes the selected attachees' ID cards into out as print sheets; returns the sheet count.
+
+    Chunks are whole sheets, so only the last page can be partly empty.
+    """
+    parts = render_chunks(
+        render_sheet_chunk, queryset, workers=workers, chunk_size=CARDS_PER_SHEET * SHEETS_PER_CHUNK
+    )
+    return _merge(out, parts)
+
+
+class ZipStream:
+    """Write-only sink for zipfile that hands back whatever was written since the last read"""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def read(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
+
+
+def iter_zip(queryset, kinds=None, workers=None):
+    """Yields a ZIP of every selected document piece by piece, as each chunk is rendered"""
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for files in render_chunks(render_file_chunk, queryset, kinds, workers):
+            for name, data in files:
+                archive.writestr(name, data)
+            yield stream.read()
+    yield stream.read()
+
+
+def write_zip(out, queryset, kinds=None, workers=None):
+    """Writes every selected document into out as a ZIP"""
+    for data in iter_zip(queryset, kinds, workers):
+        out.write(data)
@@ -0,0 +1,79 @@
+import os
+import time
+import zipfile
+
+from django.utils import timezone
+
+from .batch import ZipStream
+from .documents import STAGE_DOCUMENTS, document_filename
+from .prerender import current_document, store_document
+
+# Uploads in the order they appear in the dashboard modal: field -> name in the bundle
+UPLOAD_FIELDS = (
+    ('id_document', 'NationalID'),
+    ('intro_letter', 'IntroLetter'),
+    ('curriculum_vitae', 'CV'),
+    ('signed_contract', 'Contract'),
+)
+# Formats that are already compressed; deflating them again only costs CPU
+STORED_EXTENSIONS = {'.pdf', '.jpg', '.jpeg', '.png', '.docx', '.zip'}
+READ_CHUNK = 64 * 1024
+
+
+def _folder(attachee):
+    return f"{attachee.tracking_id}_{attachee.last_name}_{attachee.first_name}".replace('/', '-')
+
+
+def _entry(name, size, date_time):
+    info = zipfile.ZipInfo(name, date_time=date_time)
+    info.file_size = size
+    stored = os.path.splitext(name)[1].lower() in STORED_EXTENSIONS
+    info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+    return info
+
+
+def _bundle_files(attachee, include_letters):
+    """(name in the bundle, open file, size, ZIP date_time) for each document of one attachee"""
+    folder = _folder(attachee)
+    for field, label in UPLOAD_FIELDS:
+        upload = getattr(attachee, field)
+        if not upload:
+            continue
+        try:
+            fh = upload.storage.open(upload.name, 'rb')
+        except FileNotFoundError:
+            continue  # a dangling name; the rest of the bundle is still useful
+        st = os.fstat(fh.fileno())
+        ext = os.path.splitext(upload.name)[1].lower()
+        yield f"{folder}/{label}{ext}", fh, st.st_size, time.localtime(st.st_mtime)[:6]
+
+    if include_letters:
+        for kind in STAGE_DOCUMENTS.get(attachee.status, ()):
+            doc = current_document(attachee, kind)
+            try:
+                fh = doc.file.open('rb')
+            except FileNotFoundError:
+                # The record outlived its file (e.g. a restored database); render it again
+                doc = store_document(attachee, kind, existing=doc)
+                fh = doc.file.open('rb')
+            modified = timezone.localtime(doc.rendered_at).timetuple()[:6]
+            yield f"{folder}/{document_filename(kind, attachee)}", fh, doc.file.size, modified
+
+
+def iter_bundle(queryset, include_letters=False):
+    """Yields a ZIP of the attachees' uploaded documents as it is built, one folder per attachee.
+
+    Files are copied in READ_CHUNK pieces and each piece is handed on as
+    soon as it is written, so memory stays flat however large the bundle
+    is. PDFs and images go in uncompressed (ZIP_STORED).
+    """
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w') as archive:
+        attachees = queryset.order_by('institution', 'last_name', 'first_name', 'id')
+        for attachee in attachees.iterator(chunk_size=200):
+            for name, fh, size, date_time in _bundle_files(attachee, include_letters):
+                with fh, archive.open(_entry(name, size, date_time), 'w') as entry:
+                    for chunk in iter(lambda: fh.read(READ_CHUNK), b''):
+                        entry.write(chunk)
+                        yield stream.read()
+    yield stream.read()
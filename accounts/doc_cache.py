@@ -0,0 +1,152 @@
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+
+from django.conf import settings
+from django.utils import timezone
+
+from .documents import DOCUMENTS, TEMPLATE_VERSION, render_document
+
+# Rendered PDFs live outside MEDIA_ROOT so they are never served directly
+CACHE_DIR = getattr(settings, 'DOCUMENT_CACHE_DIR', os.path.join(settings.BASE_DIR, 'document_cache'))
+MAX_BYTES = getattr(settings, 'DOCUMENT_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+
+# Branding images baked into the documents; replacing one must change every key
+ASSET_PATHS = [
+    os.path.join(settings.BASE_DIR, 'static/images/letterhead.png'),
+    os.path.join(settings.BASE_DIR, 'static/images/signature.png'),
+]
+
+_lock = threading.Lock()
+_approx_size = None  # bytes on disk, tracked per process between scans
+
+
+def _asset_stamp():
+    stamp = []
+    for path in ASSET_PATHS:
+        try:
+            st = os.stat(path)
+            stamp.append(f"{st.st_mtime_ns}:{st.st_size}")
+        except OSError:
+            stamp.append('-')
+    return '|'.join(stamp)
+
+
+def fingerprint(kind, attachee, dated=True):
+    """Content address of a document: its template version plus every input it prints.
+
+    dated=False leaves out today's date, for stored copies that keep the
+    date they were issued on.
+    """
+    spec = DOCUMENTS[kind]
+    # SITE_URL is printed in the verification QR code
+    parts = [kind, str(TEMPLATE_VERSION), _asset_stamp(), settings.SITE_URL]
+    parts += [f"{name}={getattr(attachee, name)}" for name in spec.fields]
+    if spec.dated and dated:
+        # Letters print today's date, so yesterday's copy is not reusable
+        parts.append(timezone.now().date().isoformat())
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()[:32]
+
+
+def _attachee_dir(attachee_id):
+    return os.path.join(CACHE_DIR, str(attachee_id))
+
+
+def cache_path(kind, attachee):
+    return os.path.join(_attachee_dir(attachee.pk), f"{kind}-{fingerprint(kind, attachee)}.pdf")
+
+
+def open_document(kind, attachee):
+    """Returns an open file of the rendered PDF, rendering it on a cache miss.
+
+    Another request's store(), invalidate() or evict() may remove the file
+    between writing and reopening it; the fresh render is then served from
+    memory rather than failing.
+    """
+    path = cache_path(kind, attachee)
+    try:
+        fh = open(path, 'rb')
+    except FileNotFoundError:
+        data = render_document(kind, attachee)
+        try:
+            store(path, kind, data)
+            return open(path, 'rb')
+        except FileNotFoundError:
+            return io.BytesIO(data)
+    # Bump the mtime so eviction treats the file as recently used
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return fh
+
+
+def store(path, kind, data):
+    """Writes a rendered document atomically and drops older renders of the same kind"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as out:
+        out.write(data)
+    os.replace(tmp, path)
+
+    for name in os.listdir(directory):
+        if name.startswith(f"{kind}-") and name != os.path.basename(path):
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+    _account(len(data))
+
+
+def invalidate(attachee_id):
+    """Forgets every cached document of one attachee (called when it is saved or deleted)"""
+    shutil.rmtree(_attachee_dir(attachee_id), ignore_errors=True)
+
+
+def _scan():
+    entries = []
+    if not os.path.isdir(CACHE_DIR):
+        return entries
+    with os.scandir(CACHE_DIR) as attachee_dirs:
+        for sub in attachee_dirs:
+            if not sub.is_dir():
+                continue
+            with os.scandir(sub.path) as files:
+                for entry in files:
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+    return entries
+
+
+def _account(added):
+    global _approx_size
+    with _lock:
+        if _approx_size is None:
+            _approx_size = sum(size for _, size, _ in _scan())
+        else:
+            _approx_size += added
+        if _approx_size > MAX_BYTES:
+            _approx_size = evict()
+
+
+def evict(target=None):
+    """Deletes least recently used files until the cache is under target bytes; returns the new size"""
+    target = int(MAX_BYTES * 0.9) if target is None else target
+    entries = sorted(_scan())
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            pass
+    return total
@@ -0,0 +1,220 @@
+import string
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from reportlab.lib.units import inch
+
+from .layout import draw_paragraph, fit_size
+from .qr import draw_qr
+from .verification import verification_url
+
+
+# --- TEMPLATE CONTEXT ---
+
+def _is_male(a):
+    return a.gender.lower() == 'male'
+
+
+# Every placeholder a template may use: name -> (attachee fields it reads, getter).
+# The fields become part of the document's render-cache key.
+CONTEXT = {
+    'first_name': (('first_name',), lambda a: a.first_name),
+    'name': (('first_name', 'last_name'), lambda a: f"{a.first_name} {a.last_name}"),
+    'full_name': (('first_name', 'last_name'), lambda a: f"{a.first_name.upper()} {a.last_name.upper()}"),
+    'gender': (('gender',), lambda a: a.gender),
+    'subj': (('gender',), lambda a: "He" if _is_male(a) else "She"),
+    'subj_lower': (('gender',), lambda a: "he" if _is_male(a) else "she"),
+    'poss': (('gender',), lambda a: "his" if _is_male(a) else "her"),
+    'obj': (('gender',), lambda a: "him" if _is_male(a) else "her"),
+    'phone': (('phone',), lambda a: a.phone),
+    'email': (('email',), lambda a: a.email),
+    'national_id_number': (('national_id_number',), lambda a: a.national_id_number),
+    'institution': (('institution',), lambda a: a.institution),
+    'tracking_id': (('tracking_id',), lambda a: a.tracking_id),
+    'start': (('start_date',), lambda a: a.start_date.strftime('%d %b %Y')),
+    'end': (('end_date',), lambda a: a.end_date.strftime('%d %b %Y')),
+    'start_month': (('start_date',), lambda a: a.start_date.strftime('%b %Y')),
+    'end_month': (('end_date',), lambda a: a.end_date.strftime('%b %Y')),
+    'weeks': (('start_date', 'end_date'), lambda a: (a.end_date - a.start_date).days // 7),
+    'today': ((), lambda a: timezone.now().strftime('%d %b %Y')),
+    'verify_url': (('tracking_id',), lambda a: verification_url(a.tracking_id)),
+}
+
+_formatter = string.Formatter()
+
+
+class TextTemplate:
+    """A str.format string whose placeholders are checked against CONTEXT when compiled"""
+
+    def __init__(self, source):
+        self.source = source
+        self.keys = {field for _, field, _, _ in _formatter.parse(source) if field is not None}
+        unknown = self.keys - set(CONTEXT)
+        if unknown:
+            raise ImproperlyConfigured(f"Unknown placeholder(s) {sorted(unknown)} in {source!r}")
+
+    def __call__(self, ctx):
+        return self.source.format_map(ctx) if self.keys else self.source
+
+
+# --- BLOCKS ---
+# Positions and widths are in inches, font sizes, leading and gaps in points.
+# A block is placed at an absolute 'y' or at 'dy' from where the previous
+# block left the cursor. Each compiles to op(p, attachee, ctx, y) -> new y.
+
+def use_form(p, name, build, bbox=(0, 0, None, None)):
+    """Draws a named form XObject, recording it in this canvas on first use.
+
+    The artwork is written into the PDF once and every later page only
+    references it, so static parts cost nothing after the first page.
+    """
+    if not p.hasForm(name):
+        p.beginForm(name, *bbox)
+        build(p)
+        p.endForm()
+    p.doForm(name)
+
+
+def _placement(block):
+    if 'y' in block:
+        absolute = block['y'] * inch
+        return lambda y: absolute
+    dy = block.get('dy', 0) * inch
+    return lambda y: y + dy
+
+
+def _compile_form(block, env):
+    name = block['name']
+    build = env.forms[name]
+
+    def op(p, attachee, ctx, y):
+        use_form(p, name, build)
+        return y
+    return op, set()
+
+
+def _compile_text(block, env):
+    place = _placement(block)
+    x = block['x'] * inch
+    font, size = block.get('font', 'Helvetica'), block.get('size', 11)
+    color = block.get('color', (0, 0, 0))
+    fit = block['fit'] * inch if 'fit' in block else None
+    text = TextTemplate(block['text'])
+    draw = {'left': 'drawString', 'center': 'drawCentredString', 'right': 'drawRightString'}[block.get('align', 'left')]
+    underline = block.get('underline', 0) * inch
+
+    def op(p, attachee, ctx, y):
+        y = place(y)
+        value = text(ctx)
+        p.setFillColorRGB(*color)
+        p.setFont(font, fit_size(value, font, size, fit) if fit else size)
+        getattr(p, draw)(x, y, value)
+        if underline:
+            p.line(x, y - 0.05*inch, x + underline, y - 0.05*inch)
+        return y
+    return op, text.keys
+
+
+def _compile_paragraphs(block, env):
+    place = _placement(block)
+    x, width = block['x'] * inch, block['width'] * inch
+    font, size = block.get('font', 'Helvetica'), block.get('size', 11)
+    leading, gap = block.get('leading', 14), block.get('gap', 0)
+    paras = [TextTemplate(source) for source in block['paras']]
+
+    def op(p, attachee, ctx, y):
+        y = place(y)
+        p.setFillColorRGB(0, 0, 0)
+        for para in paras:
+            y -= draw_paragraph(p, para(ctx), x, y, width, font, size, leading) + gap
+        return y
+    return op, set().union(*(para.keys for para in paras))
+
+
+def _compile_qr(block, env):
+    place = _placement(block)
+    x, size = block['x'] * inch, block['size'] * inch
+    data = TextTemplate(block['data'])
+
+    def op(p, attachee, ctx, y):
+        y = place(y)
+        draw_qr(p, data(ctx), x, y, size)
+        return y
+    return op, data.keys
+
+
+def _compile_footer(block, env):
+    place = _placement(block)
+    footer = env.footer
+
+    def op(p, attachee, ctx, y):
+        y = place(y)
+        footer(p, attachee, y)
+        return y
+    # The footer reads the attachee directly; its fields are added by DocumentPlan
+    return op, set()
+
+
+BLOCK_COMPILERS = {
+    'form': _compile_form,
+    'text': _compile_text,
+    'paragraphs': _compile_paragraphs,
+    'qr': _compile_qr,
+    'footer': _compile_footer,
+}
+
+
+# --- PLANS ---
+
+class Environment:
+    """What templates can refer to besides CONTEXT: named artwork forms and the letter footer.
+
+    footer_fields are the attachee fields the footer prints; a footer also
+    prints today's date, so documents with one are dated.
+    """
+
+    def __init__(self, forms, footer, footer_fields):
+        self.forms = forms
+        self.footer = footer
+        self.footer_fields = footer_fields
+
+
+class DocumentPlan:
+    """A document template compiled into a flat list of drawing operations"""
+
+    def __init__(self, template, env):
+        self.pagesize = template['pagesize']
+        self.filename_prefix = template['filename_prefix']
+        self.ops, keys = [], set()
+        dated = False
+        for block in template['blocks']:
+            op, block_keys = BLOCK_COMPILERS[block['type']](block, env)
+            self.ops.append(op)
+            keys |= block_keys
+            dated = dated or block['type'] == 'footer'
+
+        self.keys = sorted(keys)
+        fields = set(env.footer_fields) if dated else set()
+        for key in self.keys:
+            fields.update(CONTEXT[key][0])
+        # fields and dated make up the render-cache key (accounts.doc_cache)
+        self.fields = tuple(sorted(fields))
+        self.dated = dated or 'today' in keys
+
+    def context(self, attachee):
+        """Only the placeholders this document uses are computed"""
+        return {key: CONTEXT[key][1](attachee) for key in self.keys}
+
+    def draw_face(self, p, attachee):
+        ctx = self.context(attachee)
+        y = 0
+        for op in self.ops:
+            y = op(p, attachee, ctx, y)
+
+    def draw(self, p, attachee):
+        self.draw_face(p, attachee)
+        p.showPage()
+
+
+def compile_templates(templates, env):
+    return {kind: DocumentPlan(template, env) for kind, template in templates.items()}
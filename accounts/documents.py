@@ -0,0 +1,379 @@
+import io
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from .doc_templates import Environment, compile_templates, use_form
+from .qr import draw_qr
+from .verification import verification_url
+
+ID_CARD_SIZE = (3.375 * inch, 2.125 * inch)
+
+# Bump whenever a layout changes so cached renders (accounts.doc_cache) are not reused
+TEMPLATE_VERSION = 6
+
+
+# --- PDF BRANDING & UTILITY FUNCTIONS ---
+
+BRAND_COLOR = (85/255, 212/255, 122/255)
+STAMP_COLOR = (0.2, 0.4, 0.7)
+
+
+def branding_image(name):
+    """Decoded image from static/images, or None if the file is missing"""
+    path = os.path.join(settings.BASE_DIR, 'static/images', name)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return _decoded_image(path, st.st_mtime_ns)
+
+
+@lru_cache(maxsize=8)
+def _decoded_image(path, mtime_ns):
+    # Keyed on mtime so replacing the file is picked up without a restart
+    return ImageReader(path)
+
+
+def _build_letterhead(p):
+    p.setStrokeColorRGB(*BRAND_COLOR)
+    p.setLineWidth(3)
+    p.rect(0.4*inch, 0.4*inch, 7.5*inch, 10.9*inch)
+    p.setLineWidth(1)
+    p.rect(0.45*inch, 0.45*inch, 7.4*inch, 10.8*inch)
+
+    letterhead = branding_image('letterhead.png')
+    if letterhead is not None:
+        bh = 1.3 * inch
+        p.drawImage(
+            letterhead, 0.5*inch, A4[1] - bh - 0.5*inch, width=7.27*inch,
+            height=bh, mask='auto', preserveAspectRatio=True
+        )
+    else:
+        p.setFillColorRGB(0.1, 0.1, 0.1)
+        p.setFont("Helvetica-Bold", 14)
+        p.drawCentredString(4.15*inch, 10.2*inch, "EUJIM SOLUTIONS LIMITED")
+        p.setFont("Helvetica", 9)
+        p.drawCentredString(4.15*inch, 10.05*inch, "Gesora Road, Utawala")
+
+
+def _build_sign_off(p):
+    """Sign-off, signature, signatory and stamp frame, drawn relative to footer_y = 0"""
+    left_margin = 0.8*inch
+    p.setFont("Helvetica", 10)
+    p.drawString(left_margin, 0.8*inch, "Yours sincerely,")
+
+    signature = branding_image('signature.png')
+    if signature is not None:
+        p.drawImage(
+            signature, left_margin, 0.25*inch, width=1.3*inch,
+            preserveAspectRatio=True, mask='auto'
+        )
+
+    p.setFont("Helvetica-Bold", 10)
+    p.drawString(left_margin, -0.05*inch, "Ombwayo Michael")
+    p.setFont("Helvetica", 9)
+    p.drawString(left_margin, -0.2*inch, "CEO, Eujim Solutions Limited")
+
+    # Official stamp, pushed right to avoid overlapping the signature/title
+    stamp_x, stamp_y = 3.3*inch, -0.7*inch
+    p.setStrokeColorRGB(*STAMP_COLOR)
+    p.setLineWidth(1.5)
+    p.rect(stamp_x, stamp_y, 2.4*inch, 1.3*inch, stroke=1, fill=0)
+
+    p.setFillColorRGB(*STAMP_COLOR)
+    p.setFont("Helvetica-Bold", 8.5)
+    p.drawCentredString(stamp_x + 1.2*inch, stamp_y + 1.1*inch, "EUJIM SOLUTIONS LIMITED")
+    p.setFont("Helvetica-Bold", 7.5)
+    p.drawCentredString(stamp_x + 1.2*inch, stamp_y + 0.95*inch, "P.O. BOX 7034-00200 NAIROBI")
+    p.drawCentredString(stamp_x + 1.2*inch, stamp_y + 0.4*inch, "Email: info@eujimsolutions.com")
+    p.drawCentredString(stamp_x + 1.2*inch, stamp_y + 0.2*inch, "TEL: 0113281424/0718099959")
+
+
+def _build_card_band(p):
+    p.setFillColorRGB(*BRAND_COLOR)
+    p.rect(0, 1.6*inch, 3.375*inch, 0.525*inch, fill=1)
+    p.setFillColorRGB(1, 1, 1)
+    p.setFont("Helvetica-Bold", 10)
+    p.drawCentredString(1.68*inch, 1.8*inch, "EUJIM SOLUTIONS LTD")
+
+
+def draw_footer(p, attachee, current_y):
+    """Standardized professional footer with clear spacing and no overlaps"""
+    # Higher base to prevent border overlap
+    footer_y = max(current_y - 0.5*inch, 2.8*inch)
+
+    # Everything but the date and the QR code is the same on every letter
+    p.saveState()
+    p.translate(0, footer_y)
+    use_form(p, 'sign_off', _build_sign_off, (0, -1*inch, A4[0], A4[1]))
+    p.restoreState()
+
+    # Verification Date in Red inside the stamp
+    stamp_x, stamp_y = 3.3*inch, footer_y - 0.7*inch
+    p.setFillColorRGB(0.8, 0.1, 0.1)
+    p.setFont("Helvetica-Bold", 10)
+    dt_txt = (
+        attachee.completion_date.strftime('%d %b %Y').upper()
+        if attachee.completion_date
+        else timezone.now().strftime('%d %b %Y').upper()
+    )
+    p.drawCentredString(stamp_x + 1.2*inch, stamp_y + 0.65*inch, dt_txt)
+    p.setFillColorRGB(0, 0, 0)
+
+    # QR CODE: Isolated on the far right; scanning it opens the verify page
+    draw_qr(p, verification_url(attachee.tracking_id), 6.5*inch, footer_y - 0.6*inch, 1.0*inch)
+
+
+# --- DOCUMENT TEMPLATES ---
+# Layouts are data compiled once at import into drawing plans
+# (accounts.doc_templates); a new document type needs only a new entry.
+# Positions are in inches from the bottom left, font sizes and gaps in points.
+
+LETTER_HEAD = [
+    {'type': 'form', 'name': 'letterhead'},
+    {'type': 'text', 'x': 0.8, 'y': 8.9, 'text': "Date: {today}"},
+    {'type': 'text', 'x': 0.8, 'y': 8.7, 'text': "Ref: {tracking_id}"},
+    {'type': 'text', 'x': 0.8, 'y': 8.3, 'font': 'Helvetica-Bold', 'text': "TO WHOM IT MAY CONCERN,"},
+]
+
+TEMPLATES = {
+    'completion': {
+        'pagesize': A4,
+        'filename_prefix': 'Completion',
+        'blocks': LETTER_HEAD + [
+            {'type': 'text', 'x': 4.15, 'y': 9.2, 'align': 'center', 'font': 'Helvetica-Bold', 'size': 16,
+             'text': "CERTIFICATE OF COMPLETION"},
+            {'type': 'paragraphs', 'x': 0.8, 'y': 7.8, 'width': 6.65, 'gap': 25, 'paras': [
+                "This is to certify that {full_name}, a student from {institution}, "
+                "has successfully fulfilled all the requirements for the Industrial Attachment "
+                "program at EUJIM SOLUTIONS LIMITED. The candidate was engaged for a "
+                "rigorous period of {weeks} weeks, effective from {start} to {end}.",
+
+                "Throughout the attachment, EUJIM SOLUTIONS LIMITED provided a structured mentorship "
+                "environment designed to bridge the gap between academic theory and industry reality. "
+                "Under our technical guidance, {first_name} underwent comprehensive training "
+                "in Hard Skills, including specialized hands-on experience in Software Development "
+                "(full-stack logic), ICT Consultancy, and Web Design. Simultaneously, we focused on "
+                "refining the candidate’s Soft Skills, specifically training {obj} in agile teamwork, "
+                "professional communication, and critical problem-solving within a high-pressure "
+                "development environment.",
+
+                "By virtue of this successful completion, {first_name} is hereby "
+                "recognized for {poss} technical competence, adaptability, and professionalism. "
+                "The candidate's performance met the required industry standards, demonstrating "
+                "significant growth and full preparedness for future professional roles in the "
+                "global technology sector. For any inquiries regarding this certification, "
+                "please contact info@eujimsolutions.com.",
+            ]},
+            {'type': 'footer', 'dy': -0.2},
+        ],
+    },
+    'recommendation': {
+        'pagesize': A4,
+        'filename_prefix': 'Recommendation',
+        'blocks': LETTER_HEAD + [
+            {'type': 'text', 'x': 4.15, 'y': 9.2, 'align': 'center', 'font': 'Helvetica-Bold', 'size': 13,
+             'text': "RECOMMENDATION LETTER"},
+            {'type': 'paragraphs', 'x': 0.8, 'y': 7.9, 'width': 6.65, 'gap': 20, 'paras': [
+                "It is a pleasure to recommend {full_name} for professional roles. "
+                "{subj} completed a rigorous {weeks}-week industrial "
+                "attachment at EUJIM SOLUTIONS where {subj_lower} made a lasting "
+                "impression under Reference No: {tracking_id}. During "
+                "{poss} time with us, {first_name} demonstrated "
+                "exceptional skills, dedication, and a passion for learning.",
+
+                "As an attachee, {first_name} worked closely with our "
+                "teams in software development, digital marketing, web design, "
+                "and ICT consultancy. {subj} showed a remarkable ability to "
+                "quickly adapt to new tasks and responsibilities, collaborating "
+                "effectively with colleagues and making significant contributions "
+                "to various projects. Throughout the attachment, {subj_lower} "
+                "demonstrated a strong work ethic, a willingness to learn, and "
+                "a commitment to delivering high-quality results.",
+
+                "I highly recommend {full_name} for any future opportunities. "
+                "{subj} has the skills, knowledge, and attitude necessary to "
+                "excel in {poss} chosen career path. If you have any further "
+                "questions, please do not hesitate to contact us through our "
+                "email info@eujimsolutions.com or call us at 0113281424.",
+            ]},
+            {'type': 'footer', 'dy': -0.2},
+        ],
+    },
+    'gate_pass': {
+        'pagesize': A4,
+        'filename_prefix': 'Pass',
+        'blocks': [
+            {'type': 'form', 'name': 'letterhead'},
+            {'type': 'text', 'x': 4.15, 'y': 9.2, 'align': 'center', 'font': 'Helvetica-Bold', 'size': 15,
+             'text': "OFFICIAL GATE PASS ({tracking_id})"},
+            {'type': 'text', 'x': 1.0, 'y': 8.7, 'font': 'Helvetica-Bold', 'size': 12, 'underline': 2.2,
+             'text': "APPLICANT DETAILS"},
+            # One paragraph per line, so a long institution name wraps instead of running off the page
+            {'type': 'paragraphs', 'x': 1.0, 'dy': -0.35, 'width': 6.25, 'leading': 0.22 * 72, 'paras': [
+                "Full Name: {name}",
+                "Phone Number: {phone}",
+                "National ID: {national_id_number}",
+                "Gender: {gender}",
+                "Institution: {institution}",
+                "Reference No: {tracking_id}",
+                "Duration: {start} to {end}",
+            ]},
+            {'type': 'text', 'x': 1.0, 'dy': -0.4, 'font': 'Helvetica-Bold', 'size': 12, 'underline': 2.5,
+             'text': "TERMS OF ENGAGEMENT"},
+            {'type': 'paragraphs', 'x': 1.0, 'dy': -0.35, 'width': 6.25, 'leading': 16, 'paras': [
+                "We welcome you, {first_name}, to EUJIM SOLUTIONS LIMITED. "
+                "During the stated period, you will be integrated into our professional team. "
+                "You are required to report to the office from Monday to Friday, between "
+                "9:00 AM and 4:00 PM. Please maintain high levels of discipline and "
+                "adhere to all company policies throughout your industrial attachment.",
+            ]},
+            {'type': 'footer', 'dy': -1.0},
+        ],
+    },
+    'id_card': {
+        'pagesize': ID_CARD_SIZE,
+        'filename_prefix': 'ID',
+        'blocks': [
+            {'type': 'form', 'name': 'card_band'},
+            {'type': 'text', 'x': 1.68, 'y': 1.4, 'align': 'center', 'font': 'Helvetica-Bold', 'size': 9,
+             'fit': 3.0, 'text': "{name}"},
+            # Fields shrink to fit beside the QR code rather than running under it
+            {'type': 'text', 'x': 0.2, 'y': 1.15, 'size': 7, 'fit': 2.25, 'text': "ID NO: {national_id_number}"},
+            {'type': 'text', 'x': 0.2, 'y': 1.0, 'size': 7, 'fit': 2.25, 'text': "PHONE: {phone}"},
+            {'type': 'text', 'x': 0.2, 'y': 0.85, 'size': 7, 'fit': 2.25, 'text': "EMAIL: {email}"},
+            {'type': 'text', 'x': 0.2, 'y': 0.7, 'size': 7, 'fit': 2.25, 'text': "REF NO: {tracking_id}"},
+            {'type': 'text', 'x': 0.2, 'y': 0.55, 'size': 7, 'fit': 2.25, 'text': "INST: {institution}"},
+            {'type': 'text', 'x': 1.68, 'y': 0.3, 'align': 'center', 'font': 'Helvetica-Bold', 'size': 6.5,
+             'color': (0.8, 0.1, 0.1), 'text': "VALID: {start_month} - {end_month}"},
+            {'type': 'qr', 'x': 2.5, 'y': 0.5, 'size': 0.7, 'data': "{verify_url}"},
+        ],
+    },
+}
+
+
+# --- DOCUMENT REGISTRY ---
+
+ENVIRONMENT = Environment(
+    forms={'letterhead': _build_letterhead, 'card_band': _build_card_band},
+    footer=draw_footer,
+    footer_fields=('tracking_id', 'completion_date'),
+)
+
+# kind -> DocumentPlan (draw, pagesize, filename_prefix, and the fields and
+# dated flag that key its render cache)
+DOCUMENTS = compile_templates(TEMPLATES, ENVIRONMENT)
+
+
+# --- ID CARD SHEETS ---
+
+# Cards are butted edge to edge in a 2 x 5 grid centred on A4, so every cut
+# line is shared by two cards and the crop marks sit in the page margin
+SHEET_COLUMNS, SHEET_ROWS = 2, 5
+CARDS_PER_SHEET = SHEET_COLUMNS * SHEET_ROWS
+SHEET_LEFT = (A4[0] - SHEET_COLUMNS * ID_CARD_SIZE[0]) / 2
+SHEET_BOTTOM = (A4[1] - SHEET_ROWS * ID_CARD_SIZE[1]) / 2
+CROP_MARK_GAP, CROP_MARK_LENGTH = 0.06*inch, 0.2*inch
+
+# Slot origins, filled left to right from the top row down
+SHEET_SLOTS = [
+    (SHEET_LEFT + col * ID_CARD_SIZE[0], SHEET_BOTTOM + row * ID_CARD_SIZE[1])
+    for row in reversed(range(SHEET_ROWS)) for col in range(SHEET_COLUMNS)
+]
+
+
+def _build_crop_marks(p):
+    p.setStrokeColorRGB(0, 0, 0)
+    p.setLineWidth(0.25)
+    top = SHEET_BOTTOM + SHEET_ROWS * ID_CARD_SIZE[1]
+    right = SHEET_LEFT + SHEET_COLUMNS * ID_CARD_SIZE[0]
+    for col in range(SHEET_COLUMNS + 1):
+        x = SHEET_LEFT + col * ID_CARD_SIZE[0]
+        p.line(x, SHEET_BOTTOM - CROP_MARK_GAP, x, SHEET_BOTTOM - CROP_MARK_GAP - CROP_MARK_LENGTH)
+        p.line(x, top + CROP_MARK_GAP, x, top + CROP_MARK_GAP + CROP_MARK_LENGTH)
+    for row in range(SHEET_ROWS + 1):
+        y = SHEET_BOTTOM + row * ID_CARD_SIZE[1]
+        p.line(SHEET_LEFT - CROP_MARK_GAP, y, SHEET_LEFT - CROP_MARK_GAP - CROP_MARK_LENGTH, y)
+        p.line(right + CROP_MARK_GAP, y, right + CROP_MARK_GAP + CROP_MARK_LENGTH, y)
+
+
+def draw_card_sheets(p, attachees):
+    """Imposes ID cards CARDS_PER_SHEET to an A4 page with crop marks; returns the sheet count"""
+    p.setPageSize(A4)
+    card = DOCUMENTS['id_card']
+    sheets = slot = 0
+    for attachee in attachees:
+        if slot == 0:
+            use_form(p, 'crop_marks', _build_crop_marks)
+        x, y = SHEET_SLOTS[slot]
+        p.saveState()
+        p.translate(x, y)
+        # Long names and emails must not spill onto the neighbouring card
+        clip = p.beginPath()
+        clip.rect(0, 0, *ID_CARD_SIZE)
+        p.clipPath(clip, stroke=0, fill=0)
+        card.draw_face(p, attachee)
+        p.restoreState()
+
+        slot += 1
+        if slot == CARDS_PER_SHEET:
+            p.showPage()
+            sheets += 1
+            slot = 0
+    if slot:
+        p.showPage()
+        sheets += 1
+    return sheets
+
+
+# Documents an attachee is entitled to at each stage
+STAGE_DOCUMENTS = {
+    'Approved': ('gate_pass',),
+    'In-Progress': ('id_card',),
+    'Completed': ('completion', 'recommendation'),
+}
+
+
+def render_document(kind, attachee):
+    """Builds one document for one attachee and returns the PDF bytes"""
+    spec = DOCUMENTS[kind]
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=spec.pagesize)
+    spec.draw(p, attachee)
+    p.save()
+    return buffer.getvalue()
+
+
+def document_filename(kind, attachee):
+    return f"{DOCUMENTS[kind].filename_prefix}_{attachee.tracking_id}.pdf"
+
+
+def render_documents(items):
+    """Draws several (kind, attachee) documents into one multi-page PDF and returns the bytes.
+
+    Sharing a canvas lets every page reuse the letterhead and stamp forms.
+    """
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer)
+    for kind, attachee in items:
+        spec = DOCUMENTS[kind]
+        p.setPageSize(spec.pagesize)
+        spec.draw(p, attachee)
+    p.save()
+    return buffer.getvalue()
+
+
+def render_card_sheets(attachees):
+    """ID cards for every attachee imposed on A4 sheets; returns the PDF bytes"""
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=A4)
+    draw_card_sheets(p, attachees)
+    p.save()
+    return buffer.getvalue()
@@ -0,0 +1,42 @@
+import csv
+
+from .models import Attachee
+from .search import search_attachees
+
+EXPORT_HEADER = [
+    'Reference No.', 'First Name', 'Last Name', 'Email',
+    'Phone', 'Institution', 'Status', 'Applied On'
+]
+EXPORT_FIELDS = (
+    'tracking_id', 'first_name', 'last_name', 'email',
+    'phone', 'institution', 'status', 'created_at'
+)
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose write() hands the line back instead of buffering it"""
+
+    def write(self, value):
+        return value
+
+
+def filtered_attachees(status_filter='', search_query=''):
+    """The dashboard's status and search filters applied to the attachee table"""
+    attachees = search_attachees(Attachee.objects.all(), search_query)
+    if status_filter:
+        attachees = attachees.filter(status=status_filter)
+    return attachees
+
+
+def iter_csv_rows(queryset):
+    """Yields CSV lines (header first) from a chunked server-side cursor.
+
+    Only the exported columns are fetched and no model instances are built,
+    so memory stays flat however many rows are exported.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    rows = queryset.order_by('-created_at', '-id').values_list(*EXPORT_FIELDS)
+    for row in rows.iterator(chunk_size=CHUNK_SIZE):
+        yield writer.writerow(row)
@@ -84,4 +84,42 @@ class AttacheeForm(forms.ModelForm):
         self.fields['signed_contract'].help_text = "Purpose: Legal agreement for free engagement & data usage. Format: Strictly PDF. Max size: 7MB."
         
         self.fields['start_date'].label = "Proposed Start Date"
-        self.fields['end_date'].label = "Proposed End Date"
\ No newline at end of file
+        self.fields['end_date'].label = "Proposed End Date"
+
+class AttacheeImportForm(forms.ModelForm):
+    """Validates one CSV row with the model's field rules (documents are not imported)"""
+    DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d %b %Y']
+
+    start_date = forms.DateField(input_formats=DATE_FORMATS)
+    end_date = forms.DateField(input_formats=DATE_FORMATS)
+    status = forms.ChoiceField(choices=Attachee.STATUS_CHOICES, required=False)
+
+    class Meta:
+        model = Attachee
+        fields = [
+            'first_name', 'last_name', 'national_id_number', 'email', 'phone',
+            'gender', 'institution', 'start_date', 'end_date', 'status',
+        ]
+
+    def clean_gender(self):
+        gender = self.cleaned_data.get('gender', '').strip().capitalize()
+        if gender not in ('Male', 'Female', 'Other'):
+            raise ValidationError("Gender must be Male, Female or Other.")
+        return gender
+
+    def clean_status(self):
+        return self.cleaned_data.get('status') or 'Pending'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get("start_date")
+        end_date = cleaned_data.get("end_date")
+
+        if start_date and end_date and end_date < start_date:
+            raise ValidationError("The attachment end date cannot be earlier than the start date.")
+        return cleaned_data
+
+    def validate_unique(self):
+        # National ID uniqueness is checked for the whole file in one query by
+        # accounts.importer instead of one query per row
+        pass
\ No newline at end of file
@@ -0,0 +1,240 @@
+import codecs
+import csv
+from collections import Counter
+
+from django.db import transaction
+
+from . import verification
+from .forms import AttacheeImportForm
+from .models import Attachee, StatusCounter
+
+BATCH_SIZE = 500
+
+# Accepts both the export's column titles and plain model field names
+HEADER_ALIASES = {
+    'first name': 'first_name',
+    'last name': 'last_name',
+    'national id': 'national_id_number',
+    'national id number': 'national_id_number',
+    'id number': 'national_id_number',
+    'email': 'email',
+    'phone': 'phone',
+    'gender': 'gender',
+    'institution': 'institution',
+    'start date': 'start_date',
+    'end date': 'end_date',
+    'status': 'status',
+    'reference no.': 'tracking_id',
+}
+
+
+class ImportReport:
+    """Outcome of an import: counts plus the problems found, keyed by CSV line number"""
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors = []  # [(line_number, message), ...]
+
+    def add_error(self, line, message):
+        self.errors.append((line, message))
+
+    @property
+    def skipped(self):
+        return self.rows - self.created - self.updated - self.unchanged
+
+    def summary(self):
+        text = f"{self.created} of {self.rows} row(s) imported"
+        if self.updated or self.unchanged:
+            text += f", {self.updated} updated, {self.unchanged} unchanged"
+        return f"{text}, {self.skipped} skipped."
+
+
+def normalize_header(name):
+    key = (name or '').strip().lower().replace('_', ' ')
+    return HEADER_ALIASES.get(key, key.replace(' ', '_'))
+
+
+def read_rows(fileobj):
+    """Yields (line_number, row_dict) from an uploaded CSV, decoding as it streams"""
+    lines = codecs.iterdecode(fileobj, 'utf-8-sig')
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if not header:
+        return
+    columns = [normalize_header(name) for name in header]
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        yield reader.line_num, {col: value.strip() for col, value in zip(columns, row)}
+
+
+def row_columns(data):
+    """The import fields a row actually supplies, i.e. the ones an upsert may overwrite"""
+    columns = {name for name in AttacheeImportForm.Meta.fields if name in data}
+    if not data.get('status'):
+        # A missing or blank status only defaults new rows to Pending
+        columns.discard('status')
+    return columns
+
+
+def validate_rows(rows, report, progress=None):
+    """Runs every row through AttacheeImportForm.
+
+    Returns [(line, unsaved Attachee, tracking_id, columns supplied)].
+    """
+    valid = []
+    for line, data in rows:
+        report.rows += 1
+        if progress and report.rows % BATCH_SIZE == 0:
+            progress(report.rows)
+        form = AttacheeImportForm(data=data)
+        if not form.is_valid():
+            for field, messages in form.errors.items():
+                label = 'row' if field == '__all__' else field
+                report.add_error(line, f"{label}: {' '.join(messages)}")
+            continue
+        instance = form.save(commit=False)
+        instance.refresh_lookup_keys()
+        valid.append((line, instance, data.get('tracking_id', '').upper(), row_columns(data)))
+    return valid
+
+
+def _chunks(values):
+    values = list(values)
+    for start in range(0, len(values), BATCH_SIZE):
+        yield values[start:start + BATCH_SIZE]
+
+
+def fetch_existing(valid, by_tracking_id=False):
+    """Loads the rows a file refers to with batched IN lookups.
+
+    Returns ({national_id: Attachee}, {tracking_id: Attachee}).
+    """
+    by_nid, by_tid = {}, {}
+    nids = {obj.national_id_number for _, obj, _, _ in valid}
+    for chunk in _chunks(nids):
+        for obj in Attachee.objects.filter(national_id_number__in=chunk):
+            by_nid[obj.national_id_number] = obj
+            by_tid[obj.tracking_id] = obj
+    if by_tracking_id:
+        tids = {tid for _, _, tid, _ in valid if tid} - set(by_tid)
+        for chunk in _chunks(tids):
+            for obj in Attachee.objects.filter(tracking_id__in=chunk):
+                by_nid[obj.national_id_number] = obj
+                by_tid[obj.tracking_id] = obj
+    return by_nid, by_tid
+
+
+def changed_fields(existing, incoming, columns):
+    """Supplied columns whose values differ, plus the lookup keys derived from them.
+
+    Columns the file does not have keep their stored values; the form's
+    defaults for them are never compared or written.
+    """
+    fields = [
+        name for name in AttacheeImportForm.Meta.fields
+        if name in columns and getattr(existing, name) != getattr(incoming, name)
+    ]
+    if 'email' in fields:
+        fields.append('email_key')
+    if 'national_id_number' in fields:
+        fields.append('national_id_key')
+    return fields
+
+
+def plan_rows(valid, report, upsert=False):
+    """Sorts valid rows into inserts and updates, rejecting conflicting national IDs.
+
+    Returns (new instances, {changed field tuple: [existing instances]}).
+    """
+    by_nid, by_tid = fetch_existing(valid, by_tracking_id=upsert)
+    to_create, to_update, claimed = [], {}, set()
+
+    for line, obj, tracking_id, columns in valid:
+        nid = obj.national_id_number
+        if nid in claimed:
+            report.add_error(line, f"national_id_number: {nid} appears more than once in the file.")
+            continue
+        claimed.add(nid)
+
+        existing = (by_tid.get(tracking_id) or by_nid.get(nid)) if upsert else None
+        if existing is None:
+            if nid in by_nid:
+                report.add_error(line, f"national_id_number: {nid} is already registered.")
+            else:
+                to_create.append(obj)
+            continue
+
+        owner = by_nid.get(nid)
+        if owner is not None and owner.pk != existing.pk:
+            report.add_error(line, f"national_id_number: {nid} belongs to {owner.tracking_id}.")
+            continue
+
+        fields = changed_fields(existing, obj, columns)
+        if not fields:
+            report.unchanged += 1
+            continue
+        for name in fields:
+            setattr(existing, name, getattr(obj, name))
+        to_update.setdefault(tuple(fields), []).append(existing)
+    return to_create, to_update
+
+
+def create_attachees(instances, batch_size=BATCH_SIZE):
+    """Inserts new attachees with bulk-reserved tracking IDs; returns the status deltas.
+
+    bulk_create skips save() and signals, so the caller adjusts the stage
+    counters; the search index is kept in sync by its database triggers.
+    """
+    Attachee.assign_tracking_ids(instances)
+    Attachee.objects.bulk_create(instances, batch_size=batch_size)
+    return Counter(obj.status for obj in instances)
+
+
+def update_attachees(groups, batch_size=BATCH_SIZE):
+    """Writes each group of rows with one bulk_update over only its changed columns"""
+    deltas = Counter()
+    for fields, instances in groups.items():
+        if 'status' in fields:
+            for obj in instances:
+                deltas[obj._loaded_status] -= 1
+                deltas[obj.status] += 1
+        Attachee.objects.bulk_update(instances, fields, batch_size=batch_size)
+    return deltas
+
+
+def import_csv(fileobj, batch_size=BATCH_SIZE, upsert=False, progress=None):
+    """Validates and applies an attachee CSV; invalid rows are skipped and reported.
+
+    With upsert=True rows matching an existing attachee by tracking ID or
+    national ID update it instead of being rejected, so re-importing the
+    same file is a no-op. Only the columns the file has are updated; a file
+    without a status column never moves an existing attachee's stage.
+    progress(rows_read) is called every BATCH_SIZE rows.
+    """
+    report = ImportReport()
+    try:
+        valid = validate_rows(read_rows(fileobj), report, progress)
+    except (UnicodeDecodeError, csv.Error) as e:
+        report.add_error(0, f"Could not read the file: {e}")
+        return report
+
+    with transaction.atomic():
+        to_create, to_update = plan_rows(valid, report, upsert=upsert)
+        deltas = Counter()
+        if to_create:
+            deltas.update(create_attachees(to_create, batch_size))
+            report.created = len(to_create)
+        if to_update:
+            deltas.update(update_attachees(to_update, batch_size))
+            report.updated = sum(len(group) for group in to_update.values())
+        StatusCounter.apply_deltas(deltas)
+        # bulk writes skip the post_save signal that drops cached verification answers
+        tracking_ids = [obj.tracking_id for obj in to_create]
+        tracking_ids += [obj.tracking_id for group in to_update.values() for obj in group]
+        transaction.on_commit(lambda: verification.forget_many(tracking_ids))
+    report.errors.sort()
+    return report
@@ -0,0 +1,193 @@
+import csv
+import os
+import tempfile
+from datetime import timedelta
+
+from django.core.files import File
+from django.db import close_old_connections, connections
+from django.utils import timezone
+
+from .exports import filtered_attachees, iter_csv_rows
+from .importer import import_csv
+from .models import Attachee, BackgroundJob
+from .prerender import prerender
+
+# Progress is written back to the job row at most this often (rows)
+PROGRESS_EVERY = 500
+# Renders are slower per row, so their progress is reported more often
+RENDER_PROGRESS_EVERY = 50
+# Running jobs older than this are assumed to belong to a dead worker
+STALE_AFTER = timedelta(hours=1)
+
+
+def queue_job(kind, user=None, params=None, input_file=None):
+    job = BackgroundJob(kind=kind, params=params or {}, created_by=user)
+    if input_file is not None:
+        job.input_file.save(input_file.name, input_file, save=False)
+    job.save()
+    return job
+
+
+def _set_progress(job_id, progress, total=None):
+    fields = {'progress': progress}
+    if total is not None:
+        fields['total'] = total
+    BackgroundJob.objects.filter(pk=job_id).update(**fields)
+
+
+def _save_result(job, name, path):
+    with open(path, 'rb') as fh:
+        job.result_file.save(name, File(fh), save=False)
+
+
+def run_export(job):
+    """Writes the filtered CSV export to a file artifact"""
+    attachees = filtered_attachees(job.params.get('status', ''), job.params.get('q', ''))
+    _set_progress(job.pk, 0, attachees.count())
+
+    written = 0
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    try:
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as out:
+            # Line 0 is the header, so the enumerate index is the rows written so far
+            for written, line in enumerate(iter_csv_rows(attachees)):
+                out.write(line)
+                if written and written % PROGRESS_EVERY == 0:
+                    _set_progress(job.pk, written)
+        _save_result(job, f"Exp_{timezone.now().date()}_{job.pk}.csv", path)
+    finally:
+        os.remove(path)
+    job.progress = job.total = written
+    job.message = f"Exported {written} record(s)."
+
+
+def run_import(job):
+    """Imports the uploaded CSV; the per-row problems become the downloadable artifact"""
+    with job.input_file.open('rb') as fh:
+        total = max(0, sum(1 for _ in fh) - 1)
+    _set_progress(job.pk, 0, total)
+
+    with job.input_file.open('rb') as fh:
+        report = import_csv(
+            fh, upsert=job.params.get('upsert', False),
+            progress=lambda rows: _set_progress(job.pk, rows)
+        )
+
+    job.progress = job.total = report.rows
+    job.message = report.summary()
+    if report.errors:
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        try:
+            with os.fdopen(fd, 'w', newline='', encoding='utf-8') as out:
+                writer = csv.writer(out)
+                writer.writerow(['Line', 'Problem'])
+                writer.writerows(report.errors)
+            _save_result(job, f"Import_report_{job.pk}.csv", path)
+        finally:
+            os.remove(path)
+
+
+def run_render(job):
+    """Stores the stage documents of the attachees a status change touched"""
+    ids = job.params.get('ids', [])
+    _set_progress(job.pk, 0, len(ids))
+
+    def progress(done):
+        if done % RENDER_PROGRESS_EVERY == 0:
+            _set_progress(job.pk, done)
+
+    rendered = prerender(ids, progress=progress)
+    job.progress = job.total = len(ids)
+    job.message = f"Rendered {rendered} document(s)."
+
+
+def run_documents(job):
+    """Writes an admin selection's documents (merged PDF, ZIP or ID card sheets) to a file artifact"""
+    # accounts.batch imports init_worker from this module
+    from . import batch
+
+    ids = job.params.get('ids', [])
+    fmt = job.params.get('format', 'pdf')
+    _set_progress(job.pk, 0, len(ids))
+    attachees = Attachee.objects.filter(pk__in=ids).order_by('institution', 'last_name', 'first_name', 'id')
+
+    extension = 'zip' if fmt == 'zip' else 'pdf'
+    fd, path = tempfile.mkstemp(suffix='.' + extension)
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            # This worker is one process of the run_jobs pool; it renders in-process
+            if fmt == 'cards':
+                summary = f"{batch.write_card_sheets(out, attachees)} sheet(s) of ID cards"
+            elif fmt == 'zip':
+                batch.write_zip(out, attachees)
+                summary = "a ZIP archive"
+            else:
+                summary = f"{batch.write_pdf(out, attachees)} page(s)"
+        prefix = 'ID_Cards' if fmt == 'cards' else 'Documents'
+        _save_result(job, f"{prefix}_{timezone.now().date()}_{job.pk}.{extension}", path)
+    finally:
+        os.remove(path)
+    job.progress = job.total = len(ids)
+    job.message = f"Wrote {summary} for {len(ids)} attachee(s)."
+
+
+HANDLERS = {
+    'export': run_export,
+    'import': run_import,
+    'render': run_render,
+    'documents': run_documents,
+}
+
+
+def run_job(job_id):
+    """Executes one claimed job; runs inside a worker process"""
+    close_old_connections()
+    job = BackgroundJob.objects.get(pk=job_id)
+    try:
+        HANDLERS[job.kind](job)
+    except Exception as e:
+        job.status = 'Failed'
+        job.message = f"{type(e).__name__}: {e}"[:2000]
+    else:
+        job.status = 'Done'
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'message', 'progress', 'total', 'result_file', 'finished_at'])
+    return job.status
+
+
+def mark_failed(job_id, error):
+    BackgroundJob.objects.filter(pk=job_id).update(
+        status='Failed', message=f"{type(error).__name__}: {error}"[:2000],
+        finished_at=timezone.now()
+    )
+
+
+def init_worker():
+    """Process pool initializer: children must not reuse the parent's DB connections"""
+    import django
+    django.setup()
+    connections.close_all()
+
+
+def requeue_stale():
+    cutoff = timezone.now() - STALE_AFTER
+    return BackgroundJob.objects.filter(status='Running', started_at__lt=cutoff).update(
+        status='Queued', started_at=None, progress=0
+    )
+
+
+def claim_jobs(limit):
+    """Marks up to `limit` queued jobs as Running and returns their ids"""
+    if limit < 1:
+        return []
+    now = timezone.now()
+    ids = list(
+        BackgroundJob.objects.filter(status='Queued')
+        .order_by('created_at', 'id').values_list('id', flat=True)[:limit]
+    )
+    claimed = []
+    for job_id in ids:
+        # The status guard keeps two workers from starting the same job
+        if BackgroundJob.objects.filter(pk=job_id, status='Queued').update(status='Running', started_at=now):
+            claimed.append(job_id)
+    return claimed
@@ -0,0 +1,65 @@
+from collections import namedtuple
+from functools import lru_cache
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+# One laid-out line; x and y are the baseline origin on the page
+LineBox = namedtuple('LineBox', 'text x y width')
+
+
+@lru_cache(maxsize=8192)
+def _unit_width(text, font):
+    # Width at 1pt; glyph widths scale linearly and the base fonts have no
+    # kerning, so a word's width at any size is this times the size
+    return stringWidth(text, font, 1)
+
+
+def text_width(text, font, size):
+    return _unit_width(text, font) * size
+
+
+def wrap(text, font, size, max_width):
+    """Breaks text into lines no wider than max_width points.
+
+    Words are measured once (and memoized), so the cost is per word, not
+    per character tried. A single word wider than the line gets a line of
+    its own.
+    """
+    space = _unit_width(' ', font) * size
+    lines, words, width = [], [], 0
+    for word in text.split():
+        w = _unit_width(word, font) * size
+        if words and width + space + w > max_width:
+            lines.append((' '.join(words), width))
+            words, width = [], 0
+        width = width + space + w if words else w
+        words.append(word)
+    if words:
+        lines.append((' '.join(words), width))
+    return lines
+
+
+def layout_paragraph(text, x, y, max_width, font='Helvetica', size=11, leading=14, align='left'):
+    """Line boxes for a paragraph whose first baseline is at y; returns (boxes, height used)"""
+    boxes = []
+    for i, (line, width) in enumerate(wrap(text, font, size, max_width)):
+        left = x + (max_width - width) / 2 if align == 'center' else x
+        boxes.append(LineBox(line, left, y - i * leading, width))
+    return boxes, len(boxes) * leading
+
+
+def draw_paragraph(p, text, x, y, max_width, font='Helvetica', size=11, leading=14, align='left'):
+    """Wraps and draws a paragraph; returns the height it took"""
+    boxes, height = layout_paragraph(text, x, y, max_width, font, size, leading, align)
+    p.setFont(font, size)
+    for box in boxes:
+        p.drawString(box.x, box.y, box.text)
+    return height
+
+
+def fit_size(text, font, size, max_width, min_size=5):
+    """The largest font size up to size at which text fits on one line of max_width"""
+    width = text_width(text, font, size)
+    if width <= max_width:
+        return size
+    return max(min_size, size * max_width / width)
@@ -0,0 +1,154 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import Count, Min
+from django.utils import timezone
+from django.utils.html import strip_tags
+
+from .models import OutboundEmail
+
+# --- OUTBOX TUNING (override in settings.py) ---
+MAX_ATTEMPTS = getattr(settings, 'MAIL_OUTBOX_MAX_ATTEMPTS', 6)
+BACKOFF_SECONDS = getattr(settings, 'MAIL_OUTBOX_BACKOFF_SECONDS', 60)
+MAX_BACKOFF_SECONDS = getattr(settings, 'MAIL_OUTBOX_MAX_BACKOFF_SECONDS', 6 * 60 * 60)
+CLAIM_TIMEOUT = timedelta(minutes=getattr(settings, 'MAIL_OUTBOX_CLAIM_TIMEOUT_MINUTES', 10))
+
+
+def queue_email(subject, html_content, to, from_email=None):
+    """Writes a message to the outbox; call inside the same transaction as the data change"""
+    if isinstance(to, str):
+        to = [to]
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=strip_tags(html_content),
+        html_body=html_content,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=','.join(to),
+    )
+
+
+def _build_message(item, connection):
+    email = EmailMultiAlternatives(
+        subject=item.subject,
+        body=item.body,
+        from_email=item.from_email,
+        to=item.recipient_list(),
+        connection=connection,
+    )
+    if item.html_body:
+        email.attach_alternative(item.html_body, "text/html")
+    return email
+
+
+def _backoff(attempts):
+    """Exponential retry delay: 1, 2, 4, 8... x BACKOFF_SECONDS, capped"""
+    return timedelta(seconds=min(BACKOFF_SECONDS * (2 ** (attempts - 1)), MAX_BACKOFF_SECONDS))
+
+
+def release_stale_claims():
+    """Puts rows back in the queue if a worker died while holding them"""
+    cutoff = timezone.now() - CLAIM_TIMEOUT
+    return OutboundEmail.objects.filter(
+        status='Sending', claimed_at__lt=cutoff
+    ).update(status='Queued', claimed_at=None)
+
+
+def claim_batch(batch_size):
+    """Marks up to batch_size due rows as Sending so parallel workers skip them"""
+    now = timezone.now()
+    due_ids = list(
+        OutboundEmail.objects.filter(status='Queued', next_attempt_at__lte=now)
+        .order_by('next_attempt_at', 'id')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    if not due_ids:
+        return []
+    # The status guard makes the claim safe if another worker raced us to a row
+    OutboundEmail.objects.filter(id__in=due_ids, status='Queued').update(
+        status='Sending', claimed_at=now
+    )
+    return list(
+        OutboundEmail.objects.filter(id__in=due_ids, status='Sending', claimed_at=now)
+        .order_by('id')
+    )
+
+
+def deliver_batch(batch_size=50):
+    """Sends one batch of due messages over a single SMTP connection.
+
+    Returns a (sent, retried, dead) tuple.
+    """
+    items = claim_batch(batch_size)
+    if not items:
+        return (0, 0, 0)
+
+    sent = retried = dead = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        # The relay is down: every claimed row counts as one failed attempt
+        for item in items:
+            if _record_failure(item, e):
+                dead += 1
+            else:
+                retried += 1
+        return (sent, retried, dead)
+
+    try:
+        for item in items:
+            try:
+                _build_message(item, connection).send()
+            except Exception as e:
+                if _record_failure(item, e):
+                    dead += 1
+                else:
+                    retried += 1
+                continue
+            item.status = 'Sent'
+            item.attempts += 1
+            item.sent_at = timezone.now()
+            item.claimed_at = None
+            item.last_error = ''
+            item.save(update_fields=['status', 'attempts', 'sent_at', 'claimed_at', 'last_error'])
+            sent += 1
+    finally:
+        connection.close()
+    return (sent, retried, dead)
+
+
+def _record_failure(item, error):
+    """Schedules a retry with backoff, or dead-letters the row. Returns True if dead."""
+    item.attempts += 1
+    item.last_error = f"{type(error).__name__}: {error}"[:2000]
+    item.claimed_at = None
+    if item.attempts >= MAX_ATTEMPTS:
+        item.status = 'Dead'
+    else:
+        item.status = 'Queued'
+        item.next_attempt_at = timezone.now() + _backoff(item.attempts)
+    item.save(update_fields=['attempts', 'last_error', 'claimed_at', 'status', 'next_attempt_at'])
+    return item.status == 'Dead'
+
+
+def requeue_dead():
+    """Gives dead-lettered messages a fresh set of attempts"""
+    return OutboundEmail.objects.filter(status='Dead').update(
+        status='Queued', attempts=0, next_attempt_at=timezone.now()
+    )
+
+
+def queue_stats():
+    """Queue depth per status plus the age of the oldest waiting message"""
+    counts = {key: 0 for key, _ in OutboundEmail.STATUS_CHOICES}
+    for row in OutboundEmail.objects.values('status').annotate(n=Count('id')):
+        counts[row['status']] = row['n']
+
+    oldest = OutboundEmail.objects.filter(status='Queued').aggregate(
+        oldest=Min('created_at')
+    )['oldest']
+    counts['oldest_queued_seconds'] = (
+        int((timezone.now() - oldest).total_seconds()) if oldest else 0
+    )
+    return counts
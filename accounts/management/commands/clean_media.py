@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from accounts import media_gc
+
+
+class Command(BaseCommand):
+    help = "Finds media files no database row refers to; reports them or moves them to quarantine"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--quarantine', action='store_true',
+            help=f"Move orphans under MEDIA_ROOT/{media_gc.QUARANTINE_DIR}/ instead of only listing them."
+        )
+        parser.add_argument(
+            '--min-age-hours', type=float, default=24,
+            help="Ignore files modified more recently than this (uploads still being saved)."
+        )
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help="Stop after this many files; the next run resumes from the checkpoint."
+        )
+        parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint and scan from the start.")
+
+    def handle(self, *args, **options):
+        orphans = size = 0
+        results = media_gc.scan(
+            min_age=options['min_age_hours'] * 3600,
+            limit=options['limit'],
+            resume=not options['restart'],
+            act=media_gc.quarantine if options['quarantine'] else None,
+        )
+        for path, file_size in results:
+            orphans += 1
+            size += file_size
+            self.stdout.write(path)
+
+        verb = "Quarantined" if options['quarantine'] else "Found"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {orphans} orphaned file(s), {size / (1024 * 1024):.1f} MB."
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from accounts import uploads
+
+
+class Command(BaseCommand):
+    help = "Removes chunked application uploads that were abandoned before the form was submitted"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=float, default=uploads.SESSION_HOURS,
+            help="Remove uploads idle for longer than this."
+        )
+
+    def handle(self, *args, **options):
+        removed = uploads.purge_expired(options['hours'])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} abandoned upload(s)."))
@@ -0,0 +1,32 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import Attachee
+from accounts.storage import dedup_storage
+
+FILE_FIELDS = ('id_document', 'intro_letter', 'curriculum_vitae', 'signed_contract')
+
+
+class Command(BaseCommand):
+    help = "Replaces duplicate attachee uploads already on disk with links to one shared copy"
+
+    def handle(self, *args, **options):
+        seen, duplicates, reclaimed, missing = set(), 0, 0, 0
+        rows = Attachee.objects.values_list(*FILE_FIELDS).iterator(chunk_size=2000)
+        for row in rows:
+            for name in row:
+                if not name or name in seen:
+                    continue
+                seen.add(name)
+                try:
+                    size = os.path.getsize(dedup_storage.path(name))
+                    if dedup_storage.adopt(name):
+                        duplicates += 1
+                        reclaimed += size
+                except FileNotFoundError:
+                    missing += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {len(seen)} file(s): {duplicates} duplicate(s) linked, "
+            f"{reclaimed / (1024 * 1024):.1f} MB reclaimed, {missing} missing."
+        ))
@@ -0,0 +1,62 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import batch
+from accounts.documents import DOCUMENTS
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates a cohort's letters and ID cards into one merged PDF or a ZIP archive, "
+        "or (--format cards) its ID cards imposed ten to an A4 sheet"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Path of the .pdf or .zip file to write.")
+        parser.add_argument('--format', choices=batch.FORMATS, help="Defaults to the output's extension.")
+        parser.add_argument(
+            '--status', action='append', dest='statuses',
+            help="Stage to include; repeatable (default: In-Progress and Completed)."
+        )
+        parser.add_argument('--institution', default='')
+        parser.add_argument('--from', dest='date_from', type=datetime.date.fromisoformat,
+                            help="Only attachments starting on or after this date (YYYY-MM-DD).")
+        parser.add_argument('--to', dest='date_to', type=datetime.date.fromisoformat,
+                            help="Only attachments ending on or before this date (YYYY-MM-DD).")
+        parser.add_argument(
+            '--kind', action='append', dest='kinds', choices=sorted(DOCUMENTS),
+            help="Document to generate; repeatable (default: the documents of each attachee's stage)."
+        )
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help="Rendering processes (default: DOCUMENT_BATCH_WORKERS or the CPU count)."
+        )
+
+    def handle(self, *args, **options):
+        output = options['output']
+        fmt = options['format'] or output.rsplit('.', 1)[-1].lower()
+        if fmt not in batch.FORMATS:
+            raise CommandError("Use a .pdf or .zip output path, or pass --format.")
+
+        attachees = batch.cohort_attachees(
+            statuses=options['statuses'] or batch.DEFAULT_STATUSES,
+            institution=options['institution'],
+            date_from=options['date_from'], date_to=options['date_to'],
+        )
+        total = attachees.count()
+        workers = options['workers'] or batch.default_workers()
+        if not total:
+            raise CommandError("No attachees match these filters.")
+
+        with open(output, 'wb') as out:
+            if fmt == 'cards':
+                sheets = batch.write_card_sheets(out, attachees, workers)
+                summary = f"{sheets} sheet(s) of ID cards"
+            elif fmt == 'pdf':
+                pages = batch.write_pdf(out, attachees, options['kinds'], workers)
+                summary = f"{pages} page(s)"
+            else:
+                batch.write_zip(out, attachees, options['kinds'], workers)
+                summary = "a ZIP archive"
+        self.stdout.write(self.style.SUCCESS(f"Wrote {summary} for {total} attachee(s) to {output}."))
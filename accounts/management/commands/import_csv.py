@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from accounts.importer import import_csv
+
+
+class Command(BaseCommand):
+    help = "Imports attachees from a CSV file and prints a per-row validation report"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help="Update attachees matched by tracking ID or national ID instead of skipping them."
+        )
+
+    def handle(self, *args, **options):
+        with open(options['path'], 'rb') as fileobj:
+            report = import_csv(
+                fileobj, batch_size=options['batch_size'], upsert=options['upsert']
+            )
+        for line, error in report.errors:
+            self.stderr.write(f"Line {line}: {error}")
+        self.stdout.write(self.style.SUCCESS(report.summary()))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from accounts import search
+
+
+class Command(BaseCommand):
+    help = "Recreates the SQLite FTS5 attachee search index and its sync triggers from the attachee table"
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("The full-text search index is only used with SQLite.")
+        search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import StatusCounter
+
+
+class Command(BaseCommand):
+    help = "Recomputes the dashboard stage counters from the attachee table"
+
+    def handle(self, *args, **options):
+        counts = StatusCounter.rebuild()
+        for status, n in counts.items():
+            self.stdout.write(f"{status}: {n}")
@@ -0,0 +1,50 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from accounts import jobs
+
+
+class Command(BaseCommand):
+    help = "Runs queued background jobs (imports, exports, document batches and pre-renders) in a pool of worker processes"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Keep polling for new jobs instead of exiting when the queue is empty."
+        )
+        parser.add_argument('--interval', type=float, default=3.0, help="Seconds between polls.")
+
+    def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+        requeued = jobs.requeue_stale()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s).")
+
+        # Forked children must open their own database connections
+        connections.close_all()
+        running = {}
+        with ProcessPoolExecutor(max_workers=workers, initializer=jobs.init_worker) as pool:
+            while True:
+                for job_id in jobs.claim_jobs(workers - len(running)):
+                    running[pool.submit(jobs.run_job, job_id)] = job_id
+                    self.stdout.write(f"Started job #{job_id}.")
+
+                if not running:
+                    if not options['loop']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+
+                done, _ = wait(running, timeout=options['interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    try:
+                        status = future.result()
+                    except Exception as e:  # the worker process itself died
+                        jobs.mark_failed(job_id, e)
+                        status = 'Failed'
+                    self.stdout.write(f"Job #{job_id}: {status}.")
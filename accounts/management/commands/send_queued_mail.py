@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts import mail
+
+
+class Command(BaseCommand):
+    help = "Drains the email outbox in batches over a reused SMTP connection"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Keep running and poll the outbox instead of exiting when it is empty."
+        )
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds to sleep between polls.")
+        parser.add_argument('--stats', action='store_true', help="Print queue depth and exit.")
+        parser.add_argument('--requeue-dead', action='store_true', help="Retry dead-lettered messages.")
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            for key, value in mail.queue_stats().items():
+                self.stdout.write(f"{key}: {value}")
+            return
+
+        if options['requeue_dead']:
+            count = mail.requeue_dead()
+            self.stdout.write(f"Requeued {count} dead message(s).")
+
+        while True:
+            mail.release_stale_claims()
+            sent, retried, dead = mail.deliver_batch(options['batch_size'])
+            if sent or retried or dead:
+                self.stdout.write(f"Sent {sent}, retrying {retried}, dead-lettered {dead}.")
+
+            # A full batch means there is likely more waiting, so go again immediately
+            if sent + retried + dead >= options['batch_size']:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
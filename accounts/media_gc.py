@@ -0,0 +1,125 @@
+import json
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+
+from .storage import BLOB_DIR
+
+# Bookkeeping lives inside MEDIA_ROOT so quarantining is a rename on the same disk
+GC_DIR = '.media_gc'
+QUARANTINE_DIR = f'{GC_DIR}/quarantine'
+CHECKPOINT_FILE = f'{GC_DIR}/checkpoint.json'
+
+
+def referenced_names():
+    """Every file name stored in any FileField, read with one streamed query per model"""
+    names = set()
+    for model in apps.get_models():
+        fields = [f.attname for f in model._meta.concrete_fields if isinstance(f, models.FileField)]
+        if not fields:
+            continue
+        for row in model._default_manager.values_list(*fields).iterator(chunk_size=5000):
+            names.update(name for name in row if name)
+    return names
+
+
+def _key(path):
+    # Paths are compared component by component, the order the walk visits them in
+    return tuple(path.split('/'))
+
+
+def walk(root, after=None, rel=''):
+    """Yields (relative path, DirEntry) for every file under root in sorted order.
+
+    With after set, everything up to and including that path is skipped
+    without descending into directories that lie wholly before it.
+    """
+    after_key = _key(after) if after else None
+    with os.scandir(os.path.join(root, rel)) as it:
+        entries = sorted(it, key=lambda e: e.name)
+    for entry in entries:
+        path = f"{rel}/{entry.name}" if rel else entry.name
+        key = _key(path)
+        if entry.is_dir(follow_symlinks=False):
+            if path == GC_DIR or (after_key and key < after_key[:len(key)]):
+                continue
+            yield from walk(root, after, path)
+        elif entry.is_file(follow_symlinks=False):
+            if after_key and key <= after_key:
+                continue
+            yield path, entry
+
+
+def is_orphan(path, entry, referenced):
+    if path.startswith(BLOB_DIR + '/'):
+        # A blob is referenced through hard links; one link left means only the blob itself
+        return entry.stat(follow_symlinks=False).st_nlink == 1
+    return path not in referenced
+
+
+class Checkpoint:
+    """Last path a scan finished with, so an interrupted scan resumes where it stopped"""
+
+    def __init__(self, root):
+        self.path = os.path.join(root, CHECKPOINT_FILE)
+
+    def load(self):
+        try:
+            with open(self.path) as fh:
+                return json.load(fh).get('after')
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self, after):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump({'after': after, 'saved_at': time.time()}, fh)
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def quarantine(root, path):
+    """Moves an orphan under QUARANTINE_DIR, keeping its relative path"""
+    target = os.path.join(root, QUARANTINE_DIR, path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(os.path.join(root, path), target)
+
+
+def scan(root=None, min_age=86400, limit=None, resume=True, act=None, checkpoint_every=1000):
+    """Walks MEDIA_ROOT and yields (path, size) for every orphan older than min_age seconds.
+
+    act(root, path) is called on each orphan (e.g. quarantine). The scan
+    position is checkpointed every checkpoint_every files and after
+    `limit` files the scan stops, to be resumed by the next run; a scan
+    that reaches the end clears the checkpoint.
+    """
+    root = root or settings.MEDIA_ROOT
+    checkpoint = Checkpoint(root)
+    after = checkpoint.load() if resume else None
+    referenced = referenced_names()
+    cutoff = time.time() - min_age
+
+    seen, last = 0, after
+    for path, entry in walk(root, after):
+        st = entry.stat(follow_symlinks=False)
+        if st.st_mtime < cutoff and is_orphan(path, entry, referenced):
+            if act:
+                act(root, path)
+            yield path, st.st_size
+        seen += 1
+        last = path
+        if seen % checkpoint_every == 0:
+            checkpoint.save(last)
+        if limit and seen >= limit:
+            checkpoint.save(last)
+            return
+    checkpoint.clear()
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:45
+
+from django.db import migrations, models
+
+
+def seed_sequences(apps, schema_editor):
+    """Start each year's counter after the highest number already issued"""
+    Attachee = apps.get_model('accounts', 'Attachee')
+    TrackingSequence = apps.get_model('accounts', 'TrackingSequence')
+    highest = {}
+    for tracking_id in Attachee.objects.values_list('tracking_id', flat=True).iterator():
+        parts = (tracking_id or '').split('-')
+        if len(parts) != 3 or not parts[1].isdigit() or not parts[2].isdigit():
+            continue
+        year, number = int(parts[1]), int(parts[2])
+        highest[year] = max(highest.get(year, 0), number)
+    TrackingSequence.objects.bulk_create([
+        TrackingSequence(year=year, last_value=number) for year, number in highest.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_outboundemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrackingSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField(unique=True)),
+                ('last_value', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
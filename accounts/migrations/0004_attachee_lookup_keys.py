@@ -0,0 +1,38 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:45
+
+from django.db import migrations, models
+
+
+def backfill_lookup_keys(apps, schema_editor):
+    Attachee = apps.get_model('accounts', 'Attachee')
+    batch = []
+    for attachee in Attachee.objects.only('id', 'email', 'national_id_number').iterator():
+        attachee.email_key = (attachee.email or '').strip().lower()
+        attachee.national_id_key = ''.join((attachee.national_id_number or '').split()).upper()
+        batch.append(attachee)
+        if len(batch) >= 1000:
+            Attachee.objects.bulk_update(batch, ['email_key', 'national_id_key'])
+            batch = []
+    if batch:
+        Attachee.objects.bulk_update(batch, ['email_key', 'national_id_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_trackingsequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachee',
+            name='email_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='attachee',
+            name='national_id_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.RunPython(backfill_lookup_keys, migrations.RunPython.noop),
+    ]
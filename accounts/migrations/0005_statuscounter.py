@@ -0,0 +1,32 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:46
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def seed_counters(apps, schema_editor):
+    Attachee = apps.get_model('accounts', 'Attachee')
+    StatusCounter = apps.get_model('accounts', 'StatusCounter')
+    StatusCounter.objects.bulk_create([
+        StatusCounter(status=row['status'], count=row['n'])
+        for row in Attachee.objects.order_by().values('status').annotate(n=Count('id'))
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_attachee_lookup_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20, unique=True)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-17 03:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_statuscounter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attachee',
+            index=models.Index(fields=['created_at', 'id'], name='attachee_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attachee',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='attachee_status_created_idx'),
+        ),
+    ]
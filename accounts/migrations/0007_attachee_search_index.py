@@ -0,0 +1,62 @@
+# Generated by Django 6.0.1 on 2026-10-17 04:02
+
+from django.db import migrations
+
+# The SQL is spelled out here rather than imported from accounts.search, so
+# later changes to that module cannot change what this migration did.
+CREATE_SQL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS accounts_attachee_fts USING fts5(
+        first_name, last_name, tracking_id, email, institution, phone,
+        content='accounts_attachee', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS accounts_attachee_fts_ai AFTER INSERT ON accounts_attachee BEGIN
+        INSERT INTO accounts_attachee_fts(rowid, first_name, last_name, tracking_id, email, institution, phone)
+        VALUES (new.id, new.first_name, new.last_name, new.tracking_id, new.email, new.institution, new.phone);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS accounts_attachee_fts_ad AFTER DELETE ON accounts_attachee BEGIN
+        INSERT INTO accounts_attachee_fts(accounts_attachee_fts, rowid, first_name, last_name, tracking_id, email, institution, phone)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.tracking_id, old.email, old.institution, old.phone);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS accounts_attachee_fts_au AFTER UPDATE ON accounts_attachee BEGIN
+        INSERT INTO accounts_attachee_fts(accounts_attachee_fts, rowid, first_name, last_name, tracking_id, email, institution, phone)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.tracking_id, old.email, old.institution, old.phone);
+        INSERT INTO accounts_attachee_fts(rowid, first_name, last_name, tracking_id, email, institution, phone)
+        VALUES (new.id, new.first_name, new.last_name, new.tracking_id, new.email, new.institution, new.phone);
+    END""",
+    "INSERT INTO accounts_attachee_fts(accounts_attachee_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS accounts_attachee_fts_ai",
+    "DROP TRIGGER IF EXISTS accounts_attachee_fts_ad",
+    "DROP TRIGGER IF EXISTS accounts_attachee_fts_au",
+    "DROP TABLE IF EXISTS accounts_attachee_fts",
+]
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other databases fall back to icontains search
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in CREATE_SQL:
+            cursor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in DROP_SQL:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_attachee_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
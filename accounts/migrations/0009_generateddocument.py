@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-17 04:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='backgroundjob',
+            name='kind',
+            field=models.CharField(choices=[('import', 'CSV Import'), ('export', 'CSV Export'), ('render', 'Document Pre-render')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='GeneratedDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('completion', 'Completion Letter'), ('recommendation', 'Recommendation Letter'), ('gate_pass', 'Gate Pass'), ('id_card', 'ID Card')], max_length=20)),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('file', models.FileField(upload_to='generated/%Y/%m/')),
+                ('rendered_at', models.DateTimeField(auto_now=True)),
+                ('attachee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='generated_documents', to='accounts.attachee')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('attachee', 'kind'), name='generated_document_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 6.0.1 on 2026-10-17 04:08
+
+import accounts.storage
+from django.db import migrations, models
+
+# On SQLite the AlterFields below rebuild accounts_attachee, which drops the
+# search index triggers from 0007_attachee_search_index. They are recreated
+# here (as they stood then, not imported from accounts.search) and the index
+# is re-read so rows written while they were missing are searchable.
+RESTORE_SEARCH_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS accounts_attachee_fts_ai AFTER INSERT ON accounts_attachee BEGIN
+        INSERT INTO accounts_attachee_fts(rowid, first_name, last_name, tracking_id, email, institution, phone)
+        VALUES (new.id, new.first_name, new.last_name, new.tracking_id, new.email, new.institution, new.phone);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS accounts_attachee_fts_ad AFTER DELETE ON accounts_attachee BEGIN
+        INSERT INTO accounts_attachee_fts(accounts_attachee_fts, rowid, first_name, last_name, tracking_id, email, institution, phone)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.tracking_id, old.email, old.institution, old.phone);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS accounts_attachee_fts_au AFTER UPDATE ON accounts_attachee BEGIN
+        INSERT INTO accounts_attachee_fts(accounts_attachee_fts, rowid, first_name, last_name, tracking_id, email, institution, phone)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.tracking_id, old.email, old.institution, old.phone);
+        INSERT INTO accounts_attachee_fts(rowid, first_name, last_name, tracking_id, email, institution, phone)
+        VALUES (new.id, new.first_name, new.last_name, new.tracking_id, new.email, new.institution, new.phone);
+    END""",
+    "INSERT INTO accounts_attachee_fts(accounts_attachee_fts) VALUES ('rebuild')",
+]
+
+
+def restore_search_triggers(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite' or 'accounts_attachee_fts' not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        for sql in RESTORE_SEARCH_TRIGGERS:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_generateddocument'),
+    ]
+
+    operations = [
+        # Unapplying rebuilds the table too; this runs after the AlterFields are reversed
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AlterField(
+            model_name='attachee',
+            name='curriculum_vitae',
+            field=models.FileField(storage=accounts.storage.DedupStorage(), upload_to='documents/cvs/'),
+        ),
+        migrations.AlterField(
+            model_name='attachee',
+            name='id_document',
+            field=models.FileField(storage=accounts.storage.DedupStorage(), upload_to='documents/ids/'),
+        ),
+        migrations.AlterField(
+            model_name='attachee',
+            name='intro_letter',
+            field=models.FileField(storage=accounts.storage.DedupStorage(), upload_to='documents/letters/'),
+        ),
+        migrations.AlterField(
+            model_name='attachee',
+            name='signed_contract',
+            field=models.FileField(blank=True, null=True, storage=accounts.storage.DedupStorage(), upload_to='contracts/signed/'),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-17 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0011_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='backgroundjob',
+            name='kind',
+            field=models.CharField(choices=[('import', 'CSV Import'), ('export', 'CSV Export'), ('render', 'Document Pre-render'), ('documents', 'Document Batch')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.0.1 on 2026-10-17 05:10
+
+from django.db import migrations
+
+# The update trigger from 0007_attachee_search_index fired on every column,
+# so status changes rewrote the attachee's index row. It now fires only
+# when a searchable column changes.
+NARROW_UPDATE_TRIGGER = [
+    "DROP TRIGGER IF EXISTS accounts_attachee_fts_au",
+    """CREATE TRIGGER accounts_attachee_fts_au
+    AFTER UPDATE OF first_name, last_name, tracking_id, email, institution, phone ON accounts_attachee BEGIN
+        INSERT INTO accounts_attachee_fts(accounts_attachee_fts, rowid, first_name, last_name, tracking_id, email, institution, phone)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.tracking_id, old.email, old.institution, old.phone);
+        INSERT INTO accounts_attachee_fts(rowid, first_name, last_name, tracking_id, email, institution, phone)
+        VALUES (new.id, new.first_name, new.last_name, new.tracking_id, new.email, new.institution, new.phone);
+    END""",
+]
+
+BROAD_UPDATE_TRIGGER = [
+    "DROP TRIGGER IF EXISTS accounts_attachee_fts_au",
+    """CREATE TRIGGER accounts_attachee_fts_au AFTER UPDATE ON accounts_attachee BEGIN
+        INSERT INTO accounts_attachee_fts(accounts_attachee_fts, rowid, first_name, last_name, tracking_id, email, institution, phone)
+        VALUES ('delete', old.id, old.first_name, old.last_name, old.tracking_id, old.email, old.institution, old.phone);
+        INSERT INTO accounts_attachee_fts(rowid, first_name, last_name, tracking_id, email, institution, phone)
+        VALUES (new.id, new.first_name, new.last_name, new.tracking_id, new.email, new.institution, new.phone);
+    END""",
+]
+
+
+def _run(schema_editor, statements):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite' or 'accounts_attachee_fts' not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def narrow_update_trigger(apps, schema_editor):
+    _run(schema_editor, NARROW_UPDATE_TRIGGER)
+
+
+def broaden_update_trigger(apps, schema_editor):
+    _run(schema_editor, BROAD_UPDATE_TRIGGER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0012_backgroundjob_documents'),
+    ]
+
+    operations = [
+        migrations.RunPython(narrow_update_trigger, broaden_update_trigger),
+    ]
@@ -1,6 +1,73 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
 from django.utils import timezone
 import datetime
+import uuid
+
+from .storage import dedup_storage
+
+TRACKING_PREFIX = "EUJ"
+
+
+def format_tracking_id(year, number):
+    return f"{TRACKING_PREFIX}-{year}-{number:03d}"
+
+
+def parse_tracking_id(tracking_id):
+    """Splits 'EUJ-2026-008' into (2026, 8); returns None for anything else"""
+    parts = (tracking_id or '').split('-')
+    if len(parts) != 3 or parts[0] != TRACKING_PREFIX:
+        return None
+    try:
+        return int(parts[1]), int(parts[2])
+    except ValueError:
+        return None
+
+
+class TrackingSequence(models.Model):
+    """Per-year counter behind EUJ-{year}-{n} reference numbers.
+
+    Numbers are never reissued, so deleting an attachee can no longer make
+    the next submission collide with an existing tracking_id.
+    """
+    year = models.PositiveIntegerField(unique=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.year}: {self.last_value}"
+
+    @classmethod
+    def reserve(cls, count=1, year=None):
+        """Atomically reserves a block of `count` numbers; returns them as a range"""
+        if count < 1:
+            return range(0)
+        year = year or datetime.datetime.now().year
+        with transaction.atomic():
+            # The UPDATE takes the row (SQLite: database) write lock, so two
+            # workers can never read the same last_value
+            updated = cls.objects.filter(year=year).update(last_value=F('last_value') + count)
+            if not updated:
+                cls._seed(year, count)
+            last = cls.objects.values_list('last_value', flat=True).get(year=year)
+        return range(last - count + 1, last + 1)
+
+    @classmethod
+    def _seed(cls, year, count):
+        """First allocation of a year: start after any number already in use"""
+        highest = 0
+        prefix = f"{TRACKING_PREFIX}-{year}-"
+        for tracking_id in Attachee.objects.filter(tracking_id__startswith=prefix).values_list('tracking_id', flat=True).iterator():
+            parsed = parse_tracking_id(tracking_id)
+            if parsed:
+                highest = max(highest, parsed[1])
+        try:
+            with transaction.atomic():
+                cls.objects.create(year=year, last_value=highest + count)
+        except IntegrityError:
+            # Another worker seeded the year first; take our block from its row
+            cls.objects.filter(year=year).update(last_value=F('last_value') + count)
+
 
 class Attachee(models.Model):
     # UPDATED: Added 'In-Progress' to the status lifecycle
@@ -28,11 +95,11 @@ class Attachee(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
     
-    # Documents
-    id_document = models.FileField(upload_to='documents/ids/')
-    intro_letter = models.FileField(upload_to='documents/letters/')
-    curriculum_vitae = models.FileField(upload_to='documents/cvs/')
-    signed_contract = models.FileField(upload_to='contracts/signed/', null=True, blank=True)
+    # Documents (identical uploads share one blob on disk, see accounts.storage)
+    id_document = models.FileField(upload_to='documents/ids/', storage=dedup_storage)
+    intro_letter = models.FileField(upload_to='documents/letters/', storage=dedup_storage)
+    curriculum_vitae = models.FileField(upload_to='documents/cvs/', storage=dedup_storage)
+    signed_contract = models.FileField(upload_to='contracts/signed/', null=True, blank=True, storage=dedup_storage)
     
     # Declaration & Consent
     data_policy_consent = models.BooleanField(default=False)
@@ -49,13 +116,88 @@ class Attachee(models.Model):
     tracking_id = models.CharField(max_length=20, unique=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Normalized copies used by the public status check (see Attachee.lookup)
+    email_key = models.CharField(max_length=254, db_index=True, editable=False, blank=True)
+    national_id_key = models.CharField(max_length=20, db_index=True, editable=False, blank=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination seeks for the dashboard (see accounts.pagination)
+            models.Index(fields=['created_at', 'id'], name='attachee_created_idx'),
+            models.Index(fields=['status', 'created_at', 'id'], name='attachee_status_created_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so the counter signal can see transitions
+        if 'status' in instance.__dict__:
+            instance._loaded_status = instance.status
+        return instance
+
+    @classmethod
+    def status_counts(cls, queryset=None):
+        """Counts per status (plus 'total') with a single GROUP BY query"""
+        queryset = cls.objects.all() if queryset is None else queryset
+        counts = {key: 0 for key, _ in cls.STATUS_CHOICES}
+        for row in queryset.order_by().values('status').annotate(n=models.Count('id')):
+            counts[row['status']] = row['n']
+        counts['total'] = sum(counts.values())
+        return counts
+
     def save(self, *args, **kwargs):
         if not self.tracking_id:
-            year = datetime.datetime.now().year
-            last_id = Attachee.objects.all().count() + 1
-            self.tracking_id = f"EUJ-{year}-{last_id:03d}"
+            self.tracking_id = Attachee.allocate_tracking_ids(1)[0]
+        self.refresh_lookup_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and ({'email', 'national_id_number'} & set(update_fields)):
+            kwargs['update_fields'] = set(update_fields) | {'email_key', 'national_id_key'}
         super().save(*args, **kwargs)
 
+    @staticmethod
+    def normalize_email(value):
+        return (value or '').strip().lower()
+
+    @staticmethod
+    def normalize_national_id(value):
+        return ''.join((value or '').split()).upper()
+
+    def refresh_lookup_keys(self):
+        """Keeps the indexed lookup columns in sync; call before bulk_create/bulk_update"""
+        self.email_key = self.normalize_email(self.email)
+        self.national_id_key = self.normalize_national_id(self.national_id_number)
+
+    @classmethod
+    def lookup(cls, query):
+        """Finds an applicant by tracking ID, email or national ID with a single index seek.
+
+        The shape of the query picks the column: an EUJ- prefix is a tracking
+        ID, an @ sign is an email, anything else is an ID/passport number.
+        """
+        query = (query or '').strip()
+        if not query:
+            return None
+        if query.upper().startswith(f"{TRACKING_PREFIX}-"):
+            # Tracking IDs are always generated upper-case, so the unique index applies directly
+            return cls.objects.filter(tracking_id=query.upper()).first()
+        if '@' in query:
+            return cls.objects.filter(email_key=cls.normalize_email(query)).first()
+        return cls.objects.filter(national_id_key=cls.normalize_national_id(query)).first()
+
+    @staticmethod
+    def allocate_tracking_ids(count, year=None):
+        """Reserves `count` reference numbers in one round-trip (for imports and bulk_create)"""
+        year = year or datetime.datetime.now().year
+        return [format_tracking_id(year, n) for n in TrackingSequence.reserve(count, year)]
+
+    @classmethod
+    def assign_tracking_ids(cls, instances):
+        """Fills in tracking_id on unsaved instances, since bulk_create skips save()"""
+        missing = [obj for obj in instances if not obj.tracking_id]
+        for obj, tracking_id in zip(missing, cls.allocate_tracking_ids(len(missing))):
+            obj.tracking_id = tracking_id
+        return instances
+
     def days_remaining(self):
         """Calculates days until attachment ends for the dashboard"""
         if self.end_date:
@@ -67,6 +209,51 @@ class Attachee(models.Model):
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.tracking_id})"
 
+class StatusCounter(models.Model):
+    """Running count of attachees per status, kept current by accounts.signals.
+
+    Queryset .update()/bulk_update() bypass the signals; code that changes
+    statuses in bulk must call StatusCounter.apply_deltas() itself, and
+    `manage.py rebuild_status_counters` recomputes everything from scratch.
+    """
+    status = models.CharField(max_length=20, unique=True)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.status}: {self.count}"
+
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """Applies {status: +n/-n} changes; joins the caller's transaction if there is one"""
+        with transaction.atomic():
+            for status, delta in deltas.items():
+                if not delta:
+                    continue
+                if not cls.objects.filter(status=status).update(count=F('count') + delta):
+                    cls.objects.get_or_create(status=status, defaults={'count': 0})
+                    cls.objects.filter(status=status).update(count=F('count') + delta)
+
+    @classmethod
+    def snapshot(cls):
+        """All stage counts (plus 'total') from one read of the counter table"""
+        rows = dict(cls.objects.values_list('status', 'count'))
+        if not rows:
+            # Never built (e.g. fresh database): fall back to the aggregate
+            return Attachee.status_counts()
+        counts = {key: rows.get(key, 0) for key, _ in Attachee.STATUS_CHOICES}
+        counts['total'] = sum(counts.values())
+        return counts
+
+    @classmethod
+    def rebuild(cls):
+        """Recomputes every counter from the attachee table"""
+        counts = Attachee.status_counts()
+        counts.pop('total')
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create([cls(status=status, count=n) for status, n in counts.items()])
+        return counts
+
 class Evaluation(models.Model):
     attachee = models.OneToOneField(Attachee, on_delete=models.CASCADE, related_name='evaluation')
     technical_competence = models.IntegerField(default=0) # Scale 1-5
@@ -87,4 +274,154 @@ class StudentFeedback(models.Model):
     submitted_at = models.DateTimeField(auto_now_add=True)
 
     def overall_satisfaction(self):
-        return round((self.mentorship_quality + self.environment_rating + self.resource_availability) / 3, 1)
\ No newline at end of file
+        return round((self.mentorship_quality + self.environment_rating + self.resource_availability) / 3, 1)
+
+class OutboundEmail(models.Model):
+    """Durable mail outbox drained by the send_queued_mail worker"""
+    STATUS_CHOICES = [
+        ('Queued', 'Queued'),
+        ('Sending', 'Sending'),
+        ('Sent', 'Sent'),
+        ('Dead', 'Dead'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255)
+    recipients = models.TextField(help_text="Comma separated list of addresses.")
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Queued')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def recipient_list(self):
+        return [addr.strip() for addr in self.recipients.split(',') if addr.strip()]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.recipients} ({self.status})"
+
+
+class BackgroundJob(models.Model):
+    """Long-running work (imports, exports, document renders and batches) handed to the run_jobs worker"""
+    KIND_CHOICES = [
+        ('import', 'CSV Import'),
+        ('export', 'CSV Export'),
+        ('render', 'Document Pre-render'),
+        ('documents', 'Document Batch'),
+    ]
+    STATUS_CHOICES = [
+        ('Queued', 'Queued'),
+        ('Running', 'Running'),
+        ('Done', 'Done'),
+        ('Failed', 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Queued')
+    params = models.JSONField(default=dict, blank=True)
+    input_file = models.FileField(upload_to='jobs/input/', null=True, blank=True)
+    result_file = models.FileField(upload_to='jobs/results/', null=True, blank=True)
+
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+    message = models.TextField(blank=True)
+
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='job_queue_idx'),
+        ]
+
+    def percent(self):
+        if self.status == 'Done':
+            return 100
+        if not self.total:
+            return 0
+        return min(99, int(self.progress * 100 / self.total))
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
+
+
+class GeneratedDocument(models.Model):
+    """A stage document rendered ahead of time and kept in media storage.
+
+    fingerprint is the content address of the inputs it was rendered from
+    (accounts.doc_cache.fingerprint); a stored file whose fingerprint no
+    longer matches the attachee is stale and gets rendered again.
+    """
+    KIND_CHOICES = [
+        ('completion', 'Completion Letter'),
+        ('recommendation', 'Recommendation Letter'),
+        ('gate_pass', 'Gate Pass'),
+        ('id_card', 'ID Card'),
+    ]
+
+    attachee = models.ForeignKey(Attachee, on_delete=models.CASCADE, related_name='generated_documents')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    fingerprint = models.CharField(max_length=64)
+    file = models.FileField(upload_to='generated/%Y/%m/')
+    rendered_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['attachee', 'kind'], name='generated_document_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.attachee.tracking_id}"
+
+
+class UploadSession(models.Model):
+    """One application document being uploaded in numbered chunks (accounts.uploads).
+
+    received counts the bytes stored so far, which is always a whole number
+    of chunks until the last one arrives; the id is the unguessable handle
+    the applicant's browser resumes with.
+    """
+    FIELD_CHOICES = [
+        ('id_document', 'National ID / Passport'),
+        ('intro_letter', 'Introduction Letter'),
+        ('curriculum_vitae', 'Curriculum Vitae'),
+        ('signed_contract', 'Signed Contract'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    field = models.CharField(max_length=30, choices=FIELD_CHOICES)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    received = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at'], name='upload_session_age_idx'),
+        ]
+
+    def chunk_count(self):
+        return max(1, -(-self.size // self.chunk_size))
+
+    def next_chunk(self):
+        return self.received // self.chunk_size
+
+    def is_complete(self):
+        return self.received == self.size
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size} bytes)"
@@ -0,0 +1,86 @@
+import base64
+import datetime
+import json
+
+from django.db.models import Q
+
+
+def encode_cursor(obj):
+    """Opaque token for an attachee's position in the (created_at, id) ordering"""
+    raw = json.dumps([obj.created_at.isoformat(), obj.pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Returns (created_at, pk), or None for a missing or tampered token"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        created_at, pk = json.loads(raw)
+        return datetime.datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, TypeError):
+        return None
+
+
+class KeysetPage:
+    """A page of rows plus the tokens for its neighbours.
+
+    Exposes the same has_previous/has_next/has_other_pages API the dashboard
+    template already uses for Django's Page.
+    """
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def keyset_page(queryset, per_page, after=None, before=None):
+    """Newest-first page of `queryset` that starts after/ends before a cursor.
+
+    Each page is an index range seek on (created_at, id) with LIMIT per_page + 1,
+    so page N costs the same as page 1 and no COUNT is needed.
+    """
+    after, before = decode_cursor(after), decode_cursor(before)
+
+    if before:
+        created_at, pk = before
+        # The lte/gte bound lets the database seek; the OR only breaks timestamp ties
+        rows = list(
+            queryset.filter(created_at__gte=created_at)
+            .filter(Q(created_at__gt=created_at) | Q(id__gt=pk))
+            .order_by('created_at', 'id')[:per_page + 1]
+        )
+        has_more = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        next_cursor = encode_cursor(rows[-1]) if rows else None
+        previous_cursor = encode_cursor(rows[0]) if rows and has_more else None
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    if after:
+        created_at, pk = after
+        queryset = queryset.filter(created_at__lte=created_at).filter(
+            Q(created_at__lt=created_at) | Q(id__lt=pk)
+        )
+    rows = list(queryset.order_by('-created_at', '-id')[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    next_cursor = encode_cursor(rows[-1]) if rows and has_more else None
+    previous_cursor = encode_cursor(rows[0]) if rows and after else None
+    return KeysetPage(rows, next_cursor, previous_cursor)
@@ -0,0 +1,57 @@
+from django.core.files.base import ContentFile
+from django.db import IntegrityError
+
+from .doc_cache import fingerprint
+from .documents import STAGE_DOCUMENTS, document_filename, render_document
+from .models import Attachee, GeneratedDocument
+
+
+def _stored(attachee, kind):
+    return GeneratedDocument.objects.filter(attachee=attachee, kind=kind).first()
+
+
+def store_document(attachee, kind, existing=None):
+    """Renders a document into media storage, replacing any older copy; returns the record"""
+    doc = existing or GeneratedDocument(attachee=attachee, kind=kind)
+    old_name = doc.file.name if doc.file else None
+    doc.fingerprint = fingerprint(kind, attachee, dated=False)
+    doc.file.save(document_filename(kind, attachee), ContentFile(render_document(kind, attachee)), save=False)
+    try:
+        doc.save()
+    except IntegrityError:
+        # Another worker stored the same document first; keep theirs
+        doc.file.delete(save=False)
+        return _stored(attachee, kind)
+    if old_name and old_name != doc.file.name:
+        doc.file.storage.delete(old_name)
+    return doc
+
+
+def current_document(attachee, kind):
+    """The stored copy of a stage document, rendered now if it is missing or stale.
+
+    Returns None for documents the attachee's stage does not pre-render.
+    """
+    doc = _stored(attachee, kind)
+    if doc is not None and doc.fingerprint == fingerprint(kind, attachee, dated=False):
+        return doc
+    if kind not in STAGE_DOCUMENTS.get(attachee.status, ()):
+        return None
+    return store_document(attachee, kind, existing=doc)
+
+
+def prerender(attachee_ids, progress=None):
+    """Stores every stage document of the given attachees that is missing or stale; returns the count rendered"""
+    rendered = 0
+    attachees = Attachee.objects.filter(pk__in=attachee_ids).order_by('id')
+    for done, attachee in enumerate(attachees.iterator(chunk_size=200), 1):
+        kinds = STAGE_DOCUMENTS.get(attachee.status, ())
+        stored = {doc.kind: doc for doc in attachee.generated_documents.filter(kind__in=kinds)}
+        for kind in kinds:
+            doc = stored.get(kind)
+            if doc is None or doc.fingerprint != fingerprint(kind, attachee, dated=False):
+                store_document(attachee, kind, existing=doc)
+                rendered += 1
+        if progress:
+            progress(done)
+    return rendered
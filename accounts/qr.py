@@ -0,0 +1,47 @@
+from functools import lru_cache
+
+import qrcode
+
+# Quiet zone in modules; 4 is what qrcode.make() used to put around the code
+QR_BORDER = 4
+
+
+@lru_cache(maxsize=2048)
+def qr_runs(payload):
+    """Dark modules of the QR code for payload as (row, first column, length) runs.
+
+    Adjacent modules on a row are merged so a code needs a few hundred
+    rectangles instead of one per module.
+    """
+    code = qrcode.QRCode(border=QR_BORDER)
+    code.add_data(payload)
+    code.make(fit=True)
+    matrix = code.get_matrix()
+
+    runs = []
+    for row, cells in enumerate(matrix):
+        start = None
+        for col, dark in enumerate(cells + [False]):
+            if dark and start is None:
+                start = col
+            elif not dark and start is not None:
+                runs.append((row, start, col - start))
+                start = None
+    return len(matrix), tuple(runs)
+
+
+def draw_qr(p, payload, x, y, size):
+    """Draws payload as a vector QR code filling the size x size square at (x, y)"""
+    modules, runs = qr_runs(payload)
+    unit = size / modules
+    top = y + size
+
+    p.saveState()
+    p.setFillColorRGB(1, 1, 1)
+    p.rect(x, y, size, size, stroke=0, fill=1)
+    p.setFillColorRGB(0, 0, 0)
+    path = p.beginPath()
+    for row, col, length in runs:
+        path.rect(x + col * unit, top - (row + 1) * unit, length * unit, unit)
+    p.drawPath(path, stroke=0, fill=1)
+    p.restoreState()
@@ -0,0 +1,123 @@
+import logging
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+# SQLite FTS5 index over the searchable attachee columns, kept in sync by
+# triggers on accounts_attachee (see migrations 0007_attachee_search_index
+# and 0013_attachee_search_update_trigger)
+FTS_TABLE = 'accounts_attachee_fts'
+FTS_TRIGGERS = (f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au')
+FTS_COLUMNS = ('first_name', 'last_name', 'tracking_id', 'email', 'institution', 'phone')
+
+# The trigram tokenizer cannot match terms shorter than three characters
+MIN_TERM_LENGTH = 3
+
+CREATE_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {', '.join(FTS_COLUMNS)},
+        content='accounts_attachee', content_rowid='id', tokenize='trigram'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON accounts_attachee BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {', '.join(FTS_COLUMNS)})
+        VALUES (new.id, {', '.join('new.' + c for c in FTS_COLUMNS)});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON accounts_attachee BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {', '.join(FTS_COLUMNS)})
+        VALUES ('delete', old.id, {', '.join('old.' + c for c in FTS_COLUMNS)});
+    END""",
+    # Only the indexed columns; a status change leaves the index row alone
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF {', '.join(FTS_COLUMNS)} ON accounts_attachee BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {', '.join(FTS_COLUMNS)})
+        VALUES ('delete', old.id, {', '.join('old.' + c for c in FTS_COLUMNS)});
+        INSERT INTO {FTS_TABLE}(rowid, {', '.join(FTS_COLUMNS)})
+        VALUES (new.id, {', '.join('new.' + c for c in FTS_COLUMNS)});
+    END""",
+]
+
+def fts_available(conn=None):
+    """True when the database is SQLite and the FTS table and its sync triggers all exist.
+
+    SQLite drops the triggers without complaint whenever a migration rebuilds
+    accounts_attachee, after which the index silently goes stale. Search then
+    falls back to icontains (slower but correct) until
+    `manage.py rebuild_search_index` recreates them.
+    """
+    conn = conn or connection
+    if conn.vendor != 'sqlite':
+        return False
+    names = (FTS_TABLE,) + FTS_TRIGGERS
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"SELECT name FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(names))})", names
+        )
+        found = {row[0] for row in cursor.fetchall()}
+    if FTS_TABLE in found and len(found) < len(names):
+        logger.warning(
+            "Search index triggers missing (%s); using icontains search. Run `manage.py rebuild_search_index`.",
+            ', '.join(sorted(set(FTS_TRIGGERS) - found))
+        )
+        return False
+    return len(found) == len(names)
+
+
+def create_index(conn=None):
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        for sql in CREATE_SQL:
+            cursor.execute(sql)
+
+
+def rebuild_index(conn=None):
+    """Recreates the index and any missing trigger, then re-reads every attachee row into it"""
+    conn = conn or connection
+    create_index(conn)
+    with conn.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def match_expression(query):
+    """Builds an FTS5 MATCH string: every usable term must appear, in any column"""
+    terms = [t for t in query.split() if len(t) >= MIN_TERM_LENGTH]
+    if not terms:
+        return None
+    # Quoting makes each term a literal substring (no FTS operators from users)
+    return ' '.join('"' + t.replace('"', '""') + '"' for t in terms)
+
+
+def _icontains_filter(query):
+    condition = Q()
+    for field in FTS_COLUMNS:
+        condition |= Q(**{f"{field}__icontains": query})
+    return condition
+
+
+def search_attachees(queryset, query, ranked=False):
+    """Filters an Attachee queryset by a free-text query.
+
+    Uses the FTS5 index when it is available and falls back to icontains
+    (a full scan) for short queries or other databases. With ranked=True the
+    rows are annotated with `search_rank` (bm25, lower is better) and ordered by it.
+    """
+    query = (query or '').strip()
+    if not query:
+        return queryset
+
+    match = match_expression(query)
+    if match is None or not fts_available():
+        return queryset.filter(_icontains_filter(query))
+
+    queryset = queryset.filter(
+        id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+    )
+    if ranked:
+        queryset = queryset.annotate(search_rank=RawSQL(
+            f"SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = accounts_attachee.id",
+            (match,)
+        )).order_by('search_rank', '-created_at')
+    return queryset
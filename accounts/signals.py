@@ -0,0 +1,47 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import doc_cache, verification
+from .models import Attachee, StatusCounter
+
+
+@receiver(pre_save, sender=Attachee)
+def remember_stored_status(sender, instance, raw=False, **kwargs):
+    """Instances loaded with status deferred do not know their stored stage; fetch it"""
+    if raw or instance._state.adding or hasattr(instance, '_loaded_status'):
+        return
+    instance._loaded_status = (
+        Attachee.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Attachee)
+def track_status_on_save(sender, instance, created, raw=False, **kwargs):
+    """Moves the attachee between stage counters when it is created or changes status"""
+    if raw:
+        return
+    update_fields = kwargs.get('update_fields')
+    if not created and update_fields is not None and 'status' not in update_fields:
+        return
+    old_status = None if created else instance._loaded_status
+    if old_status != instance.status:
+        deltas = {instance.status: 1}
+        if old_status:
+            deltas[old_status] = -1
+        StatusCounter.apply_deltas(deltas)
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Attachee)
+def track_status_on_delete(sender, instance, **kwargs):
+    StatusCounter.apply_deltas({getattr(instance, '_loaded_status', None) or instance.status: -1})
+
+
+@receiver(post_save, sender=Attachee)
+@receiver(post_delete, sender=Attachee)
+def drop_cached_documents(sender, instance, raw=False, **kwargs):
+    """Generated letters and verification answers go stale when the attachee changes"""
+    if raw or kwargs.get('created'):
+        return
+    doc_cache.invalidate(instance.pk)
+    verification.forget(instance.tracking_id)
@@ -0,0 +1,123 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+# Blobs live under MEDIA_ROOT/<BLOB_DIR>/<2 hex>/<2 hex>/<sha256><ext>
+BLOB_DIR = 'blobs'
+HASH_CHUNK = 1024 * 1024
+
+
+def file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+@deconstructible
+class DedupStorage(FileSystemStorage):
+    """FileSystemStorage that keeps one copy of each distinct upload.
+
+    An upload is hashed while it streams to disk and stored once as a blob
+    named by its SHA-256. The friendly name the model records is a hard
+    link to that blob, so URLs, paths and backups that follow hard links
+    keep working unchanged. The blob's link count is its reference count:
+    deleting the last friendly name removes the blob too.
+    """
+
+    def blob_name(self, digest, ext=''):
+        return f"{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{digest}{ext.lower()}"
+
+    def _stream_to_temp(self, content, directory):
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.part')
+        sha = hashlib.sha256()
+        with os.fdopen(fd, 'wb') as out:
+            if hasattr(content, 'seek'):
+                content.seek(0)
+            for chunk in content.chunks():
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                sha.update(chunk)
+                out.write(chunk)
+        return tmp, sha.hexdigest()
+
+    def _ensure_dir(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def _save(self, name, content):
+        blob_root = self.path(BLOB_DIR)
+        os.makedirs(blob_root, exist_ok=True)
+        tmp, digest = self._stream_to_temp(content, blob_root)
+        blob = self.path(self.blob_name(digest, os.path.splitext(name)[1]))
+        self._ensure_dir(blob)
+        try:
+            if not os.path.exists(blob):
+                os.replace(tmp, blob)
+                tmp = None
+                if self.file_permissions_mode is not None:
+                    os.chmod(blob, self.file_permissions_mode)
+
+            while True:
+                full_path = self.path(name)
+                self._ensure_dir(full_path)
+                try:
+                    os.link(blob, full_path)
+                    break
+                except FileExistsError:
+                    # Same race FileSystemStorage handles: pick another name
+                    name = self.get_available_name(name)
+                except FileNotFoundError:
+                    # The last reference was deleted while we were hashing
+                    if tmp is None:
+                        raise
+                    os.replace(tmp, blob)
+                    tmp = None
+        finally:
+            if tmp is not None:
+                os.remove(tmp)
+        return str(name).replace('\\', '/')
+
+    def delete(self, name):
+        if not name:
+            raise ValueError("The name must be given to delete().")
+        full_path = self.path(name)
+        try:
+            st = os.stat(full_path)
+        except FileNotFoundError:
+            return
+        blob = None
+        if st.st_nlink == 2:
+            # Only this name and the blob itself are left
+            candidate = self.path(self.blob_name(file_digest(full_path), os.path.splitext(name)[1]))
+            if os.path.exists(candidate) and os.path.samefile(candidate, full_path):
+                blob = candidate
+        super().delete(name)
+        if blob is not None:
+            try:
+                if os.stat(blob).st_nlink == 1:
+                    os.remove(blob)
+            except FileNotFoundError:
+                pass
+
+    def adopt(self, name):
+        """Turns an existing plain file into a reference to its blob; returns True if it was a duplicate"""
+        full_path = self.path(name)
+        if os.stat(full_path).st_nlink > 1:
+            return False  # already a reference
+        blob = self.path(self.blob_name(file_digest(full_path), os.path.splitext(name)[1]))
+        self._ensure_dir(blob)
+        if not os.path.exists(blob):
+            os.link(full_path, blob)
+            return False
+        # Swap the copy for a link to the blob without a moment where the name is missing
+        tmp = full_path + '.dedup'
+        os.link(blob, tmp)
+        os.replace(tmp, full_path)
+        return True
+
+
+dedup_storage = DedupStorage()
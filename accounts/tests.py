@@ -1,3 +1,641 @@
-from django.test import TestCase
+import base64
+import datetime
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core import mail as django_mail
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import doc_cache, mail, media_gc, search, uploads
+from .importer import import_csv
+from .models import (
+    Attachee, BackgroundJob, OutboundEmail, StatusCounter, TrackingSequence, UploadSession,
+    format_tracking_id,
+)
+from .pagination import keyset_page
+from .storage import dedup_storage
+from .transitions import bulk_transition
+from .verification import make_token
+
+
+def make_attachee(n, save=True, **fields):
+    """An attachee with valid details; n keeps the unique columns apart"""
+    values = {
+        'first_name': f'First{n}', 'last_name': f'Last{n}', 'national_id_number': f'ID{n}',
+        'email': f'a{n}@example.com', 'phone': '0712000000', 'gender': 'Female',
+        'institution': 'University of Nairobi',
+        'start_date': datetime.date(2026, 1, 5), 'end_date': datetime.date(2026, 4, 5),
+    }
+    values.update(fields)
+    attachee = Attachee(**values)
+    if save:
+        attachee.save()
+    return attachee
+
+
+class TempDirsMixin:
+    """Points settings at empty temporary directories for each test; temp_dirs maps attribute -> setting"""
+    temp_dirs = {'media': 'MEDIA_ROOT'}
+
+    def setUp(self):
+        super().setUp()
+        overrides = {}
+        for attr, setting in self.temp_dirs.items():
+            path = tempfile.mkdtemp()
+            self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+            setattr(self, attr, path)
+            overrides[setting] = path
+        settings_override = override_settings(**overrides)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class TrackingSequenceTests(TestCase):
+
+    def test_blocks_never_overlap(self):
+        first = TrackingSequence.reserve(3, year=2026)
+        second = TrackingSequence.reserve(2, year=2026)
+        self.assertEqual(list(first), [1, 2, 3])
+        self.assertEqual(list(second), [4, 5])
+
+    def test_each_year_counts_separately(self):
+        TrackingSequence.reserve(5, year=2026)
+        self.assertEqual(list(TrackingSequence.reserve(1, year=2027)), [1])
+        self.assertEqual(list(TrackingSequence.reserve(1, year=2026)), [6])
+
+    def test_first_reservation_starts_after_existing_ids(self):
+        year = datetime.datetime.now().year
+        make_attachee(1, tracking_id=format_tracking_id(year, 41))
+        TrackingSequence.objects.filter(year=year).delete()
+        self.assertEqual(list(TrackingSequence.reserve(1, year=year)), [42])
+
+    def test_saved_and_bulk_created_attachees_get_distinct_ids(self):
+        saved = [make_attachee(n) for n in range(3)]
+        bulk = Attachee.assign_tracking_ids([make_attachee(n, save=False) for n in range(3, 8)])
+        Attachee.objects.bulk_create(bulk)
+        ids = [a.tracking_id for a in saved + bulk]
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_deleting_an_attachee_does_not_reissue_its_id(self):
+        last = make_attachee(1)
+        last.delete()
+        self.assertNotEqual(make_attachee(2).tracking_id, last.tracking_id)
+
+
+class SearchIndexTests(TestCase):
+
+    def setUp(self):
+        self.attachee = make_attachee(1, first_name='Zebulon', last_name='Mwangi')
+
+    def found(self, query):
+        return list(search.search_attachees(Attachee.objects.all(), query))
+
+    def test_index_follows_edits(self):
+        self.assertEqual(self.found('zebul'), [self.attachee])
+        self.attachee.first_name = 'Wanjiru'
+        self.attachee.email = 'wanjiru@example.org'
+        self.attachee.save()
+        self.assertEqual(self.found('zebul'), [])
+        self.assertEqual(self.found('wanjiru mwangi'), [self.attachee])
+        self.assertEqual(self.found('example.org'), [self.attachee])
+
+        Attachee.objects.filter(pk=self.attachee.pk).update(tracking_id='EUJ-2026-777')
+        self.assertEqual(self.found('2026-777'), [self.attachee])
+
+    def test_update_trigger_ignores_other_columns(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sql FROM sqlite_master WHERE name = %s", [f'{search.FTS_TABLE}_au'])
+            sql = cursor.fetchone()[0]
+        self.assertIn(f"UPDATE OF {', '.join(search.FTS_COLUMNS)} ON", sql)
+
+    def test_missing_trigger_disables_the_index_until_rebuilt(self):
+        self.assertTrue(search.fts_available())
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TRIGGER {search.FTS_TABLE}_au")
+        with self.assertLogs('accounts.search', 'WARNING'):
+            self.assertFalse(search.fts_available())
+            # Still correct through the icontains fallback
+            self.assertEqual(self.found('zebul'), [self.attachee])
+        search.rebuild_index()
+        self.assertTrue(search.fts_available())
+
+    def test_short_terms_fall_back_to_icontains(self):
+        self.assertIsNone(search.match_expression('mw'))
+        self.assertEqual(self.found('mw'), [self.attachee])
+        self.assertEqual(self.found('zz'), [])
+
+
+class UpsertImportTests(TestCase):
+
+    def setUp(self):
+        self.attachee = make_attachee(1, status='Approved')
+
+    def run_import(self, text):
+        return import_csv(io.BytesIO(text.encode()), upsert=True)
+
+    def test_file_without_status_keeps_the_stage(self):
+        report = self.run_import(
+            "Reference No.,First Name,Last Name,National ID,Email,Phone,Gender,Institution,Start Date,End Date\n"
+            f"{self.attachee.tracking_id},Renamed,Last1,ID1,a1@example.com,0712000000,Female,"
+            "University of Nairobi,2026-01-05,2026-04-05\n"
+        )
+        self.assertEqual((report.updated, report.errors), (1, []))
+        self.attachee.refresh_from_db()
+        self.assertEqual(self.attachee.first_name, 'Renamed')
+        self.assertEqual(self.attachee.status, 'Approved')
+
+    def test_only_the_columns_present_are_written(self):
+        Attachee.objects.filter(pk=self.attachee.pk).update(phone='0799999999')
+        self.run_import(
+            "National ID,First Name,Last Name,Email,Phone,Gender,Institution,Start Date,End Date,Status\n"
+            "ID1,First1,Last1,new@example.com,0799999999,Female,University of Nairobi,2026-01-05,2026-04-05,\n"
+        )
+        self.attachee.refresh_from_db()
+        self.assertEqual(self.attachee.email, 'new@example.com')
+        self.assertEqual(self.attachee.email_key, 'new@example.com')
+        self.assertEqual(self.attachee.status, 'Approved')
+
+    def test_status_change_and_reimport_keep_counters_correct(self):
+        text = (
+            "National ID,First Name,Last Name,Email,Phone,Gender,Institution,Start Date,End Date,Status\n"
+            "ID1,First1,Last1,a1@example.com,0712000000,Female,University of Nairobi,2026-01-05,2026-04-05,Rejected\n"
+            "ID2,First2,Last2,a2@example.com,0712000000,Male,University of Nairobi,2026-01-05,2026-04-05,\n"
+        )
+        first = self.run_import(text)
+        self.assertEqual((first.created, first.updated, first.unchanged), (1, 1, 0))
+        self.assertEqual(Attachee.objects.get(national_id_number='ID2').status, 'Pending')
+        self.assertEqual(StatusCounter.snapshot(), Attachee.status_counts())
+
+        again = self.run_import(text)
+        self.assertEqual((again.created, again.updated, again.unchanged), (0, 0, 2))
+        self.assertEqual(StatusCounter.snapshot(), Attachee.status_counts())
+
+
+class BulkTransitionTests(TestCase):
+
+    def setUp(self):
+        self.pending = [make_attachee(n) for n in range(3)]
+        self.approved = make_attachee(3, status='Approved')
+        self.ids = [a.pk for a in self.pending] + [self.approved.pk]
+
+    def test_rows_already_at_the_stage_are_skipped(self):
+        changed = bulk_transition(self.ids, 'Approved', 'http://testserver/verify/')
+        self.assertCountEqual([a.pk for a in changed], [a.pk for a in self.pending])
+        self.assertEqual(Attachee.objects.filter(status='Approved').count(), 4)
+
+    def test_one_outbox_row_per_changed_attachee(self):
+        bulk_transition(self.ids, 'Approved', 'http://testserver/verify/')
+        emails = OutboundEmail.objects.all()
+        self.assertCountEqual([e.recipients for e in emails], [a.email for a in self.pending])
+        self.assertTrue(all(e.status == 'Queued' for e in emails))
+        self.assertIn(self.pending[0].tracking_id, OutboundEmail.objects.get(recipients='a0@example.com').body)
+
+    def test_counters_follow_the_deltas(self):
+        before = StatusCounter.snapshot()
+        bulk_transition(self.ids, 'Approved', 'http://testserver/verify/')
+        after = StatusCounter.snapshot()
+        self.assertEqual(after['Pending'], before['Pending'] - 3)
+        self.assertEqual(after['Approved'], before['Approved'] + 3)
+        self.assertEqual(after, Attachee.status_counts())
+
+    def test_completed_sets_the_completion_date_and_queues_documents(self):
+        bulk_transition(self.ids, 'Completed', 'http://testserver/verify/')
+        dates = set(Attachee.objects.values_list('completion_date', flat=True))
+        self.assertEqual(dates, {timezone.now().date()})
+        job = BackgroundJob.objects.get(kind='render')
+        self.assertCountEqual(job.params['ids'], self.ids)
+
+    def test_nothing_to_change_writes_nothing(self):
+        bulk_transition([self.approved.pk], 'Approved', 'http://testserver/verify/')
+        self.assertFalse(OutboundEmail.objects.exists())
+        self.assertFalse(BackgroundJob.objects.exists())
+
+
+class DedupStorageTests(TempDirsMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.content = b'%PDF-1.4 same letter'
+        digest = hashlib.sha256(self.content).hexdigest()
+        self.blob = dedup_storage.path(dedup_storage.blob_name(digest, '.pdf'))
+
+    def save(self, name):
+        return dedup_storage.save(name, ContentFile(self.content))
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.save('intro_letters/a.pdf')
+        second = self.save('intro_letters/b.pdf')
+        self.assertTrue(os.path.samefile(dedup_storage.path(first), self.blob))
+        self.assertTrue(os.path.samefile(dedup_storage.path(second), self.blob))
+        self.assertEqual(os.stat(self.blob).st_nlink, 3)
+
+    def test_blob_outlives_all_but_the_last_reference(self):
+        first = self.save('intro_letters/a.pdf')
+        second = self.save('intro_letters/b.pdf')
+
+        dedup_storage.delete(first)
+        self.assertFalse(dedup_storage.exists(first))
+        self.assertTrue(os.path.exists(self.blob))
+        with dedup_storage.open(second, 'rb') as fh:
+            self.assertEqual(fh.read(), self.content)
+
+        dedup_storage.delete(second)
+        self.assertFalse(os.path.exists(self.blob))
+
+    def test_name_clash_gets_a_new_name_for_the_same_blob(self):
+        first = self.save('intro_letters/a.pdf')
+        second = self.save('intro_letters/a.pdf')
+        self.assertNotEqual(first, second)
+        self.assertTrue(os.path.samefile(dedup_storage.path(second), self.blob))
+
+
+class MediaGcTests(TempDirsMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.kept = dedup_storage.save('documents/cvs/kept.pdf', ContentFile(b'kept'))
+        make_attachee(1, curriculum_vitae=self.kept)
+        dropped = dedup_storage.save('documents/cvs/dropped.pdf', ContentFile(b'dropped'))
+        os.remove(dedup_storage.path(dropped))  # the blob loses its last reference
+        self.old_file('documents/ids/stray.pdf')
+        self.old_file('.media_gc/quarantine/documents/ids/earlier.pdf')
+        for dirpath, _, filenames in os.walk(self.media):
+            for name in filenames:
+                self.age(os.path.join(dirpath, name))
+
+    def old_file(self, name, content=b'x'):
+        path = os.path.join(self.media, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as fh:
+            fh.write(content)
+        self.age(path)
+        return path
+
+    def age(self, path, seconds=2 * 86400):
+        then = time.time() - seconds
+        os.utime(path, (then, then))
+
+    def blob(self, content):
+        return dedup_storage.blob_name(hashlib.sha256(content).hexdigest(), '.pdf')
+
+    def orphans(self, **options):
+        return [path for path, _ in media_gc.scan(**options)]
+
+    def test_only_unreferenced_files_and_blobs_are_collected(self):
+        self.assertCountEqual(self.orphans(), [self.blob(b'dropped'), 'documents/ids/stray.pdf'])
+
+    def test_recent_files_are_left_alone(self):
+        self.age(self.old_file('documents/ids/new.pdf'), seconds=60)
+        self.assertNotIn('documents/ids/new.pdf', self.orphans())
+        self.assertIn('documents/ids/new.pdf', self.orphans(min_age=30))
+
+    def test_quarantine_moves_orphans_and_keeps_references(self):
+        self.orphans(act=media_gc.quarantine)
+        quarantine = os.path.join(self.media, media_gc.QUARANTINE_DIR)
+        self.assertTrue(os.path.exists(os.path.join(quarantine, 'documents/ids/stray.pdf')))
+        self.assertFalse(os.path.exists(os.path.join(self.media, 'documents/ids/stray.pdf')))
+        self.assertTrue(dedup_storage.exists(self.kept))
+        self.assertTrue(os.path.exists(dedup_storage.path(self.blob(b'kept'))))
+        # Nothing under .media_gc is scanned, so a second pass finds nothing
+        self.assertEqual(self.orphans(act=media_gc.quarantine), [])
+
+    def test_limited_runs_resume_and_cover_every_file_once(self):
+        for n in range(5):
+            self.old_file(f'documents/ids/stray{n}.pdf')
+        everything = self.orphans(resume=False)
+
+        collected = self.orphans(limit=3)
+        self.assertIsNotNone(media_gc.Checkpoint(self.media).load())
+        while media_gc.Checkpoint(self.media).load():
+            collected += self.orphans(limit=3)
+        self.assertEqual(collected, everything)
+        self.assertEqual(len(set(collected)), len(collected))
+
+
+@override_settings(MEDIA_SENDFILE_BACKEND=None)
+class ProtectedMediaTests(TempDirsMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        os.makedirs(os.path.join(self.media, 'cvs'))
+        with open(os.path.join(self.media, 'cvs', 'cv.pdf'), 'wb') as fh:
+            fh.write(b'0123456789')
+        self.url = reverse('protected_media', args=['cvs/cv.pdf'])
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+
+    def test_anonymous_and_staff_users_are_turned_away(self):
+        self.assertRedirects(self.client.get(self.url), reverse('home') + '?next=' + self.url,
+                             fetch_redirect_response=False)
+        staff = User.objects.create_user('clerk', 'clerk@example.com', 'pass', is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_admin_gets_the_file_and_can_revalidate(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.getvalue(), b'0123456789')
+        self.assertIn('private', response['Cache-Control'])
+
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_range_requests(self):
+        self.client.force_login(self.admin)
+        partial = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.getvalue(), b'2345')
+        self.assertEqual(partial['Content-Range'], 'bytes 2-5/10')
+
+        suffix = self.client.get(self.url, HTTP_RANGE='bytes=-3')
+        self.assertEqual((suffix.status_code, suffix.getvalue()), (206, b'789'))
+
+        beyond = self.client.get(self.url, HTTP_RANGE='bytes=20-30')
+        self.assertEqual(beyond.status_code, 416)
+        self.assertEqual(beyond['Content-Range'], 'bytes */10')
+
+    def test_paths_outside_media_are_not_served(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('protected_media', args=['../settings.py']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_quarantine_is_never_served(self):
+        quarantine = os.path.join(self.media, '.media_gc', 'quarantine')
+        os.makedirs(quarantine)
+        with open(os.path.join(quarantine, 'x.pdf'), 'wb') as fh:
+            fh.write(b'orphan')
+        self.client.force_login(self.admin)
+        for path in ['.media_gc/quarantine/x.pdf', 'cvs/../.media_gc/quarantine/x.pdf',
+                     './.media_gc/quarantine/x.pdf']:
+            response = self.client.get(reverse('protected_media', args=[path]))
+            self.assertEqual(response.status_code, 404, path)
+
+
+class ChunkedUploadTests(TempDirsMixin, TestCase):
+    temp_dirs = {'chunks': 'CHUNKED_UPLOAD_DIR'}
+
+    def setUp(self):
+        super().setUp()
+        # 10 bytes in chunks of 4: 0123 / 4567 / 89
+        self.session = UploadSession.objects.create(
+            field='curriculum_vitae', filename='cv.pdf', size=10, chunk_size=4
+        )
+
+    def test_chunks_in_order_complete_the_upload(self):
+        for index, data in enumerate([b'0123', b'4567', b'89']):
+            session = uploads.write_chunk(self.session, index, data)
+        self.assertTrue(session.is_complete())
+        with uploads.assemble(session) as upload:
+            self.assertEqual(upload.read(), b'0123456789')
+
+    def test_out_of_order_chunk_is_rejected(self):
+        uploads.write_chunk(self.session, 0, b'0123')
+        with self.assertRaises(uploads.ChunkOutOfOrder):
+            uploads.write_chunk(self.session, 2, b'89')
+        self.assertEqual(self.session.received, 4)
+
+    def test_duplicate_chunk_is_accepted_without_moving_the_offset(self):
+        uploads.write_chunk(self.session, 0, b'0123')
+        session = uploads.write_chunk(self.session, 0, b'xxxx')
+        self.assertEqual(session.received, 4)
+        session = uploads.write_chunk(session, 1, b'4567')
+        self.assertEqual(session.received, 8)
+        with open(uploads.part_path(session), 'rb') as fh:
+            self.assertEqual(fh.read(), b'01234567')
+
+    def test_short_chunk_is_rejected(self):
+        with self.assertRaises(ValueError):
+            uploads.write_chunk(self.session, 0, b'012')
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.received, 0)
+
+    def test_view_answers_with_the_offset(self):
+        url = reverse('upload_chunk', args=[self.session.pk, 1])
+        response = self.client.put(url, b'4567', content_type='application/octet-stream')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['next_chunk'], 0)
+
+        url = reverse('upload_chunk', args=[self.session.pk, 0])
+        for _ in range(2):
+            response = self.client.put(url, b'0123', content_type='application/octet-stream')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['offset'], 4)
+
+
+class VerificationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.attachee = make_attachee(1, status='Approved')
+        self.url = reverse('verify_document', args=[make_token(self.attachee.tracking_id)])
+
+    def verified_status(self):
+        response = self.client.get(self.url, {'format': 'json'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()['status']
+
+    def test_genuine_token_shows_the_public_record(self):
+        data = self.client.get(self.url, {'format': 'json'}).json()
+        self.assertEqual((data['valid'], data['tracking_id']), (True, self.attachee.tracking_id))
+        self.assertNotIn('email', data)
+
+    def test_forged_tokens_are_rejected(self):
+        token = make_token(self.attachee.tracking_id)
+        other = make_token(format_tracking_id(2026, 999)).rpartition('.')[2]
+        for forged in [token[:-1] + ('A' if token[-1] != 'A' else 'B'),
+                       f"{self.attachee.tracking_id}.{other}",
+                       self.attachee.tracking_id,
+                       '.' + token.rpartition('.')[2]]:
+            response = self.client.get(reverse('verify_document', args=[forged]), {'format': 'json'})
+            self.assertEqual(response.status_code, 404, forged)
+            self.assertFalse(response.json()['valid'])
+
+    def test_answers_are_cached(self):
+        self.assertEqual(self.verified_status(), 'Approved')
+        Attachee.objects.filter(pk=self.attachee.pk).update(status='Rejected')
+        self.assertEqual(self.verified_status(), 'Approved')
+
+    def test_saving_drops_the_cached_answer(self):
+        self.verified_status()
+        self.attachee.status = 'In-Progress'
+        self.attachee.save()
+        self.assertEqual(self.verified_status(), 'In-Progress')
+
+    def test_bulk_transition_drops_the_cached_answer(self):
+        self.verified_status()
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_transition([self.attachee.pk], 'Completed', 'http://testserver/verify/')
+        self.assertEqual(self.verified_status(), 'Completed')
+
+    def test_import_drops_the_cached_answer(self):
+        self.verified_status()
+        with self.captureOnCommitCallbacks(execute=True):
+            import_csv(io.BytesIO(
+                b"National ID,First Name,Last Name,Email,Phone,Gender,Institution,Start Date,End Date,Status\n"
+                b"ID1,First1,Last1,a1@example.com,0712000000,Female,University of Nairobi,2026-01-05,2026-04-05,Rejected\n"
+            ), upsert=True)
+        self.assertEqual(self.verified_status(), 'Rejected')
+
+
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        self.first = mail.queue_email("Update", "<p>Hello</p>", 'a@example.com')
+        self.second = mail.queue_email("Update", "<p>Hello</p>", ['b@example.com', 'c@example.com'])
+
+    def failing_connection(self, on_open=False):
+        connection = mock.Mock()
+        if on_open:
+            connection.open.side_effect = ConnectionRefusedError("relay down")
+        else:
+            connection.send_messages.side_effect = OSError("mailbox full")
+        return mock.patch('accounts.mail.get_connection', return_value=connection)
+
+    def test_batch_goes_out_and_rows_are_marked_sent(self):
+        self.assertEqual(mail.deliver_batch(), (2, 0, 0))
+        self.assertEqual([m.to for m in django_mail.outbox], [['a@example.com'], ['b@example.com', 'c@example.com']])
+        self.assertEqual(set(OutboundEmail.objects.values_list('status', 'attempts')), {('Sent', 1)})
+        self.assertEqual(mail.deliver_batch(), (0, 0, 0))
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        delays = [mail._backoff(n).total_seconds() for n in range(1, 5)]
+        self.assertEqual(delays, [mail.BACKOFF_SECONDS * f for f in (1, 2, 4, 8)])
+        self.assertEqual(mail._backoff(50).total_seconds(), mail.MAX_BACKOFF_SECONDS)
+
+    def test_failed_send_is_retried_later(self):
+        with self.failing_connection():
+            before = timezone.now()
+            self.assertEqual(mail.deliver_batch(), (0, 2, 0))
+        self.first.refresh_from_db()
+        self.assertEqual((self.first.status, self.first.attempts), ('Queued', 1))
+        self.assertIn('mailbox full', self.first.last_error)
+        self.assertGreaterEqual(self.first.next_attempt_at, before + mail._backoff(1))
+        # Not due yet, so the next run leaves them alone
+        self.assertEqual(mail.deliver_batch(), (0, 0, 0))
+
+    def test_unreachable_relay_counts_as_an_attempt(self):
+        with self.failing_connection(on_open=True):
+            self.assertEqual(mail.deliver_batch(), (0, 2, 0))
+        self.assertEqual(set(OutboundEmail.objects.values_list('status', 'attempts')), {('Queued', 1)})
+        self.assertIn('relay down', OutboundEmail.objects.get(pk=self.first.pk).last_error)
+
+    def test_last_attempt_dead_letters_until_requeued(self):
+        OutboundEmail.objects.update(attempts=mail.MAX_ATTEMPTS - 1)
+        with self.failing_connection():
+            self.assertEqual(mail.deliver_batch(), (0, 0, 2))
+        self.assertEqual(OutboundEmail.objects.filter(status='Dead').count(), 2)
+
+        self.assertEqual(mail.requeue_dead(), 2)
+        self.assertEqual(set(OutboundEmail.objects.values_list('status', 'attempts')), {('Queued', 0)})
+        self.assertEqual(mail.deliver_batch(), (2, 0, 0))
+
+    def test_abandoned_claims_are_released(self):
+        self.assertEqual(len(mail.claim_batch(10)), 2)
+        self.assertEqual(mail.claim_batch(10), [])  # a second worker gets nothing
+        self.assertEqual(mail.release_stale_claims(), 0)
+
+        OutboundEmail.objects.filter(pk=self.first.pk).update(
+            claimed_at=timezone.now() - mail.CLAIM_TIMEOUT - timedelta(minutes=1)
+        )
+        self.assertEqual(mail.release_stale_claims(), 1)
+        self.assertEqual([item.pk for item in mail.claim_batch(10)], [self.first.pk])
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        # Seven rows over four timestamps, so three pairs tie on created_at
+        base = timezone.now()
+        self.attachees = [make_attachee(n) for n in range(7)]
+        for n, attachee in enumerate(self.attachees):
+            attachee.created_at = base + timedelta(minutes=n // 2)
+            Attachee.objects.filter(pk=attachee.pk).update(created_at=attachee.created_at)
+        self.newest_first = sorted(self.attachees, key=lambda a: (a.created_at, a.pk), reverse=True)
+
+    def page(self, **cursor):
+        return keyset_page(Attachee.objects.all(), 3, **cursor)
+
+    def test_pages_forwards_then_backwards(self):
+        first = self.page()
+        second = self.page(after=first.next_cursor)
+        third = self.page(after=second.next_cursor)
+        self.assertEqual(list(first) + list(second) + list(third), self.newest_first)
+        self.assertFalse(first.has_previous())
+        self.assertFalse(third.has_next())
+
+        back = self.page(before=third.previous_cursor)
+        self.assertEqual(list(back), list(second))
+        self.assertEqual(list(self.page(before=back.previous_cursor)), list(first))
+        self.assertFalse(self.page(before=back.previous_cursor).has_previous())
+
+    def test_ties_on_created_at_are_broken_by_id(self):
+        # Page boundaries fall between rows sharing a timestamp; none is skipped or repeated
+        seen, cursor = [], None
+        while True:
+            page = keyset_page(Attachee.objects.all(), 1, after=cursor)
+            seen += list(page)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, self.newest_first)
+
+    def test_bad_cursors_fall_back_to_the_first_page(self):
+        first = list(self.page())
+        bad = [
+            'not-a-cursor', '!!!',
+            base64.urlsafe_b64encode(b'{"a": 1, "b": 2}').decode(),
+            base64.urlsafe_b64encode(b'["2026-01-01T00:00:00", "abc"]').decode(),
+            base64.urlsafe_b64encode(b'[null, 1]').decode(),
+            base64.urlsafe_b64encode(b'\xff\xfe').decode(),
+        ]
+        for token in bad:
+            self.assertEqual(list(self.page(after=token)), first, token)
+            self.assertEqual(list(self.page(before=token)), first, token)
+
+
+class DocumentCacheTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        for patcher in [mock.patch.object(doc_cache, 'CACHE_DIR', directory),
+                        mock.patch.object(doc_cache, 'render_document', return_value=b'%PDF-1.4 letter')]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.attachee = make_attachee(1, status='Approved')
+
+    def read(self):
+        with doc_cache.open_document('gate_pass', self.attachee) as fh:
+            return fh.read()
+
+    def test_second_request_is_served_from_disk(self):
+        self.assertEqual(self.read(), b'%PDF-1.4 letter')
+        self.assertEqual(self.read(), b'%PDF-1.4 letter')
+        self.assertEqual(doc_cache.render_document.call_count, 1)
+        self.assertTrue(os.path.exists(doc_cache.cache_path('gate_pass', self.attachee)))
+
+    def test_file_removed_by_another_request_is_still_served(self):
+        real_store = doc_cache.store
+
+        def store_then_lose(path, kind, data):
+            real_store(path, kind, data)
+            doc_cache.invalidate(self.attachee.pk)
+
+        with mock.patch.object(doc_cache, 'store', side_effect=store_then_lose):
+            self.assertEqual(self.read(), b'%PDF-1.4 letter')
+        # The next request misses and renders again
+        self.assertEqual(self.read(), b'%PDF-1.4 letter')
+        self.assertEqual(doc_cache.render_document.call_count, 2)
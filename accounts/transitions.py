@@ -0,0 +1,137 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.html import escape, strip_tags
+
+from . import verification
+from .documents import STAGE_DOCUMENTS
+from .jobs import queue_job
+from .models import Attachee, OutboundEmail, StatusCounter
+
+# Email copy per stage: (body text, button label). {start} and {end} are
+# filled in per attachee.
+STATUS_MESSAGES = {
+    'Approved': (
+        "Congratulations! Your application has been APPROVED. "
+        "We expect total discipline during your tenure.",
+        "Get Gate Pass"
+    ),
+    'In-Progress': (
+        "You have started your attachment. Your tenure is "
+        "from {start} to {end}. You can "
+        "now download your official Attachment ID card.",
+        "Download ID Card"
+    ),
+    'Rejected': (
+        "We regret to inform you that your application was "
+        "not successful at this time.",
+        "Check Status"
+    ),
+    'Completed': (
+        "Your attachment period is now COMPLETED. We wish you "
+        "the very best in your future endeavors.",
+        "Get Documents"
+    )
+}
+
+# Stand-ins rendered into the template once, then swapped per recipient
+PLACEHOLDERS = {
+    'name': '[[NAME]]',
+    'tracking': '[[TRACKING]]',
+    'start': '[[START]]',
+    'end': '[[END]]',
+}
+
+
+class StatusEmailTemplate:
+    """email_template.html rendered once for a stage, personalised by string substitution"""
+
+    def __init__(self, status, action_url):
+        body_text, btn_label = STATUS_MESSAGES[status]
+        self.html = render_to_string('accounts/email_template.html', {
+            'name': PLACEHOLDERS['name'],
+            'body_text': body_text.format(start=PLACEHOLDERS['start'], end=PLACEHOLDERS['end']),
+            'tracking_number': PLACEHOLDERS['tracking'],
+            'action_url': action_url,
+            'action_text': btn_label,
+            'footer_note': "Contact info@eujimsolutions.com"
+        })
+        self.text = strip_tags(self.html)
+
+    @staticmethod
+    def _fill(content, values, quote):
+        for key, token in PLACEHOLDERS.items():
+            content = content.replace(token, quote(values[key]))
+        return content
+
+    def message_for(self, attachee):
+        """An unsaved OutboundEmail for one attachee"""
+        values = {
+            'name': attachee.first_name,
+            'tracking': attachee.tracking_id,
+            'start': attachee.start_date.strftime('%d %b %Y'),
+            'end': attachee.end_date.strftime('%d %b %Y'),
+        }
+        return OutboundEmail(
+            subject=f"Update - Ref: {attachee.tracking_id}",
+            body=self._fill(self.text, values, str),
+            html_body=self._fill(self.html, values, escape),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipients=attachee.email,
+        )
+
+
+def queue_status_emails(attachees, new_status, action_url):
+    """Queues the stage email for every attachee with one render and one INSERT"""
+    if new_status not in STATUS_MESSAGES or not attachees:
+        return 0
+    template = StatusEmailTemplate(new_status, action_url)
+    OutboundEmail.objects.bulk_create([template.message_for(a) for a in attachees])
+    return len(attachees)
+
+
+def queue_prerender(attachees, new_status):
+    """Hands the documents the new stage needs to the run_jobs worker, so the first download is a stored file"""
+    if new_status not in STAGE_DOCUMENTS or not attachees:
+        return None
+    return queue_job('render', params={'ids': [a.pk for a in attachees]})
+
+
+def bulk_transition(ids, new_status, action_url):
+    """Moves the selected attachees to new_status in one transaction.
+
+    Rows already at new_status are left alone. Returns the attachees that
+    changed; their notifications go out through the outbox worker, which
+    sends the whole batch over one SMTP connection, and their stage
+    documents are pre-rendered by one background job.
+    """
+    fields = ['status']
+    with transaction.atomic():
+        changed = list(
+            Attachee.objects.filter(pk__in=ids).exclude(status=new_status).only(
+                'id', 'status', 'first_name', 'email', 'tracking_id', 'start_date', 'end_date'
+            )
+        )
+        deltas = Counter()
+        today = timezone.now().date()
+        for attachee in changed:
+            deltas[attachee.status] -= 1
+            deltas[new_status] += 1
+            attachee.status = new_status
+            if new_status == 'Completed':
+                attachee.completion_date = today
+        if new_status == 'Completed':
+            fields.append('completion_date')
+
+        # bulk_update skips signals, so the stage counters and the
+        # verification cache are handled here
+        Attachee.objects.bulk_update(changed, fields, batch_size=500)
+        StatusCounter.apply_deltas(deltas)
+        tracking_ids = [attachee.tracking_id for attachee in changed]
+        transaction.on_commit(lambda: verification.forget_many(tracking_ids))
+        queue_status_emails(changed, new_status, action_url)
+        queue_prerender(changed, new_status)
+    return changed
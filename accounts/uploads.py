@@ -0,0 +1,150 @@
+import mimetypes
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.utils import timezone
+
+from .models import UploadSession
+
+# Server-chosen chunk size; small enough that a dropped chunk is cheap to resend
+CHUNK_SIZE = 512 * 1024
+# Same limit the form advertises for every document
+MAX_UPLOAD_SIZE = 7 * 1024 * 1024
+# Unfinished sessions older than this are removed by `manage.py clean_uploads`
+SESSION_HOURS = 24
+# The form posts the session id of a finished upload as <field>_upload
+FIELD_SUFFIX = '_upload'
+EXPIRED_MESSAGE = "This upload has expired; please choose the file again."
+
+
+class ChunkOutOfOrder(ValueError):
+    """A chunk arrived before the ones preceding it"""
+
+
+def upload_dir():
+    return getattr(settings, 'CHUNKED_UPLOAD_DIR', os.path.join(settings.BASE_DIR, 'upload_chunks'))
+
+
+def part_path(session):
+    return os.path.join(upload_dir(), f"{session.pk.hex}.part")
+
+
+def start_session(field, filename, size):
+    """Opens an upload of `size` bytes for one of the application's document fields"""
+    if field not in dict(UploadSession.FIELD_CHOICES):
+        raise ValueError("Unknown document field.")
+    filename = os.path.basename(filename or '').strip()[:255]
+    if not filename:
+        raise ValueError("The file needs a name.")
+    if not 0 < size <= MAX_UPLOAD_SIZE:
+        raise ValueError("The file size must not exceed 7MB.")
+    return UploadSession.objects.create(field=field, filename=filename, size=size, chunk_size=CHUNK_SIZE)
+
+
+def state(session):
+    """What the browser needs to resume: the byte offset and the first chunk still missing"""
+    return {
+        'id': str(session.pk),
+        'chunk_size': session.chunk_size,
+        'chunks': session.chunk_count(),
+        'offset': session.received,
+        'next_chunk': session.next_chunk(),
+        'complete': session.is_complete(),
+    }
+
+
+def write_chunk(session, index, data):
+    """Stores chunk number `index` and returns the session as it now stands.
+
+    Chunks must arrive in order; one that was already stored (a retry whose
+    first response was lost) is accepted without writing. The chunk is
+    written at its own offset rather than appended, so a retry after a
+    crash mid-write overwrites the torn bytes, and the offset only moves
+    once the write is complete, through a guarded update that a
+    concurrent duplicate cannot apply twice.
+    """
+    if index < session.next_chunk() or session.is_complete():
+        return session
+    if index > session.next_chunk():
+        raise ChunkOutOfOrder(f"Chunk {session.next_chunk()} is missing.")
+    expected = min(session.chunk_size, session.size - session.received)
+    if len(data) != expected:
+        raise ValueError(f"Chunk {index} should be {expected} bytes, got {len(data)}.")
+
+    os.makedirs(upload_dir(), exist_ok=True)
+    fd = os.open(part_path(session), os.O_WRONLY | os.O_CREAT, 0o600)
+    try:
+        os.pwrite(fd, data, session.received)
+    finally:
+        os.close(fd)
+
+    UploadSession.objects.filter(pk=session.pk, received=session.received).update(
+        received=session.received + expected, updated_at=timezone.now()
+    )
+    session.refresh_from_db()
+    return session
+
+
+def assemble(session):
+    """The finished upload as an UploadedFile the form can validate and save"""
+    if not session.is_complete():
+        raise ValidationError(f"The upload of {session.filename} is not finished.", code='incomplete')
+    content_type = mimetypes.guess_type(session.filename)[0] or 'application/octet-stream'
+    return UploadedFile(open(part_path(session), 'rb'), session.filename, content_type, session.size)
+
+
+def collect(data, files):
+    """Merges finished chunked uploads named in the POST data into request.FILES.
+
+    Returns (files, sessions used, errors by field). A file sent the
+    ordinary way in the same request wins over a chunked one.
+    """
+    files = files.copy()
+    sessions, errors = {}, {}
+    for field, _ in UploadSession.FIELD_CHOICES:
+        upload_id = data.get(field + FIELD_SUFFIX)
+        if not upload_id or field in files:
+            continue
+        try:
+            session = UploadSession.objects.get(pk=upload_id, field=field)
+            files[field] = assemble(session)
+        except (UploadSession.DoesNotExist, FileNotFoundError, ValidationError) as exc:
+            # An unknown or malformed id, or a part file already purged, reads as expired
+            incomplete = isinstance(exc, ValidationError) and exc.code == 'incomplete'
+            errors[field] = exc.messages[0] if incomplete else EXPIRED_MESSAGE
+        else:
+            sessions[field] = session
+    return files, sessions, errors
+
+
+def discard(sessions):
+    """Removes finished sessions and their part files once the application is saved"""
+    for session in sessions:
+        try:
+            os.remove(part_path(session))
+        except FileNotFoundError:
+            pass
+    UploadSession.objects.filter(pk__in=[session.pk for session in sessions]).delete()
+
+
+def purge_expired(hours=SESSION_HOURS):
+    """Deletes sessions idle for longer than `hours` and part files no session owns; returns the count"""
+    cutoff = timezone.now() - timedelta(hours=hours)
+    expired = list(UploadSession.objects.filter(updated_at__lt=cutoff))
+    discard(expired)
+
+    live = {pk.hex for pk in UploadSession.objects.values_list('pk', flat=True)}
+    strays = 0
+    try:
+        entries = list(os.scandir(upload_dir()))
+    except FileNotFoundError:
+        entries = []
+    for entry in entries:
+        name, ext = os.path.splitext(entry.name)
+        if ext == '.part' and name not in live and entry.stat().st_mtime < cutoff.timestamp():
+            os.remove(entry.path)
+            strays += 1
+    return len(expired) + strays
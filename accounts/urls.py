@@ -12,18 +12,35 @@ urlpatterns = [
     
     # FIXED: Name changed from 'apply' to 'add_attachee' to match your templates
     path('apply/', views.add_attachee, name='add_attachee'), 
+
+    # Resumable document uploads for the application form (see accounts.uploads)
+    path('apply/uploads/', views.start_upload, name='start_upload'),
+    path('apply/uploads/<uuid:upload_id>/', views.upload_status, name='upload_status'),
+    path('apply/uploads/<uuid:upload_id>/<int:index>/', views.upload_chunk, name='upload_chunk'),
     
     path('application-success/<str:application_number>/', views.application_success, name='application_success'),
     path('check-status/', views.check_status, name='check_status'),
+    path('verify/<str:token>/', views.verify_document, name='verify_document'),
     path('dashboard/', views.dashboard, name='dashboard'),
     
     # Dashboard Data Tools (Excel/CSV Utilities)
     path('dashboard/export/', views.export_attachees, name='export_attachees'),
     path('dashboard/import/', views.import_attachees, name='import_attachees'),
+    path('dashboard/bundle/', views.download_bundle, name='download_bundle'),
+    path('dashboard/bundle/<int:attachee_id>/', views.download_bundle, name='download_attachee_bundle'),
+
+    # Background Jobs (large imports/exports handled by `manage.py run_jobs`)
+    path('dashboard/jobs/export/', views.queue_export, name='queue_export'),
+    path('dashboard/jobs/<int:pk>/', views.job_status, name='job_status'),
+    path('dashboard/jobs/<int:pk>/download/', views.job_download, name='job_download'),
     
     # Dashboard Modal Status & Notes Update Logic
     # This path connects the AJAX/Form from the dashboard modal to the database
     path('update-status/<int:pk>/', views.update_status, name='update_status'),
+    path('bulk-status/', views.bulk_update_status, name='bulk_update_status'),
+
+    # Uploaded documents, admins only (see MEDIA_SENDFILE_BACKEND in settings)
+    path('dashboard/media/<path:path>', views.protected_media, name='protected_media'),
     
     # Legacy Admin Action Paths (Individual button actions)
     path('approve/<int:attachee_id>/', views.approve_student, name='approve_student'),
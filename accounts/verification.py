@@ -0,0 +1,76 @@
+import base64
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .models import Attachee
+
+# Answers are cached in the default cache and dropped by forget() when an
+# attachee changes. With the default per-process LocMemCache, forget() only
+# reaches the process that made the change, and the other workers keep the
+# old answer for up to CACHE_SECONDS. Production needs a shared backend
+# (see CACHES in settings).
+SALT = 'accounts.verification'
+# 12 bytes of HMAC-SHA256 (96 bits) keeps the QR code small and is still unguessable
+SIGNATURE_BYTES = 12
+CACHE_SECONDS = 300
+CACHE_PREFIX = 'verify:'
+
+# What a verifier is shown; nothing beyond what the documents already print
+PUBLIC_FIELDS = (
+    'tracking_id', 'first_name', 'last_name', 'institution', 'status',
+    'start_date', 'end_date', 'completion_date',
+)
+
+
+def _signature(tracking_id):
+    digest = salted_hmac(SALT, tracking_id, algorithm='sha256').digest()[:SIGNATURE_BYTES]
+    return base64.urlsafe_b64encode(digest).decode().rstrip('=')
+
+
+def make_token(tracking_id):
+    return f"{tracking_id}.{_signature(tracking_id)}"
+
+
+def check_token(token):
+    """The tracking ID a token was issued for, or None if the signature does not match"""
+    tracking_id, _, signature = token.rpartition('.')
+    if not tracking_id or not constant_time_compare(signature, _signature(tracking_id)):
+        return None
+    return tracking_id
+
+
+def verification_url(tracking_id):
+    """Absolute URL printed in a document's QR code"""
+    path = reverse('verify_document', args=[make_token(tracking_id)])
+    return settings.SITE_URL.rstrip('/') + path
+
+
+def _cache_key(tracking_id):
+    return CACHE_PREFIX + tracking_id
+
+
+def verified_record(tracking_id):
+    """The public details of an attachee, read through the cache; None if unknown.
+
+    Misses are cached too, so repeated scans of a withdrawn document do not
+    reach the database either.
+    """
+    key = _cache_key(tracking_id)
+    record = cache.get(key)
+    if record is None:
+        found = Attachee.objects.filter(tracking_id=tracking_id).values(*PUBLIC_FIELDS).first()
+        record = found or {}
+        cache.set(key, record, CACHE_SECONDS)
+    return record or None
+
+
+def forget(tracking_id):
+    cache.delete(_cache_key(tracking_id))
+
+
+def forget_many(tracking_ids):
+    """forget() for rows written by bulk paths, which skip the post_save signal"""
+    cache.delete_many([_cache_key(tracking_id) for tracking_id in tracking_ids])
@@ -1,25 +1,51 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, quote_etag, url_has_allowed_host_and_scheme
 from django.contrib import messages
 from django.contrib.auth.decorators import user_passes_test
-from django.db.models import Q, Count
-from django.http import FileResponse, HttpResponse
+from django.db.models import Count
+from django.http import (
+    FileResponse, Http404, HttpResponseNotModified, JsonResponse, StreamingHttpResponse,
+)
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
 from django.utils import timezone
-from django.core.mail import EmailMultiAlternatives
+from django.db import transaction
 from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from django.core.paginator import Paginator
+from django.core.cache import cache
+from django.core.exceptions import SuspiciousFileOperation
 from django.conf import settings
-from .models import Attachee, StudentFeedback
+from django.utils._os import safe_join
+from .models import Attachee, BackgroundJob, StatusCounter, StudentFeedback, UploadSession
 from .forms import AttacheeForm
-import io
-import qrcode
-import textwrap
+from .mail import queue_email
+from .pagination import keyset_page
+from .search import search_attachees
+from .exports import filtered_attachees, iter_csv_rows
+from .bundles import iter_bundle
+from .importer import import_csv
+from .jobs import queue_job
+from .transitions import bulk_transition, queue_prerender, queue_status_emails
+from .documents import document_filename
+from .doc_cache import open_document
+from .media_gc import GC_DIR as MEDIA_GC_DIR
+from .prerender import current_document
+from .sendfile import serve_file
+from . import uploads
+from .verification import CACHE_SECONDS as VERIFY_CACHE_SECONDS, check_token, verified_record
+import hashlib
 import os
-import csv
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import inch
-from reportlab.lib.utils import ImageReader
+
+
+# Search result counts shown on the dashboard are cached this long
+DASHBOARD_COUNT_CACHE_SECONDS = 60
+
+# Row errors listed after an import; the rest are summarised
+IMPORT_ERRORS_SHOWN = 10
+
+# Uploads bigger than this are imported by the background job worker
+IMPORT_INLINE_MAX_BYTES = 2 * 1024 * 1024
 
 
 # Helper for Admin access
@@ -32,48 +58,99 @@ def home(request):
 
 
 def add_attachee(request):
+    resumed = {}
     if request.method == 'POST':
-        form = AttacheeForm(request.POST, request.FILES)
-        if form.is_valid():
-            instance = form.save()
+        # Documents may arrive as ordinary file fields or as finished chunked uploads
+        files, resumed, upload_errors = uploads.collect(request.POST, request.FILES)
+        form = AttacheeForm(request.POST, files)
+        for field, error in upload_errors.items():
+            form.errors.pop(field, None)  # a bare "required" says less than the upload's own problem
+            form.add_error(field, error)
+        try:
+            if form.is_valid():
+                # The outbox row commits with the application; the worker sends it
+                with transaction.atomic():
+                    instance = form.save()
+                    _queue_received_email(request, instance)
+                uploads.discard(resumed.values())
+
+                return redirect(
+                    'application_success',
+                    application_number=instance.tracking_id
+                )
+        finally:
+            for field in resumed:
+                files[field].close()
+    else:
+        form = AttacheeForm()
+    # Finished chunked uploads stay valid, so a form with errors keeps them
+    return render(request, 'accounts/add_attachee.html', {'form': form, 'resumed': resumed})
 
-            # --- Application Received Email ---
-            action_url = request.build_absolute_uri('/check-status/')
-            body_text = (
-                "Your application has been well received and is currently in "
-                "progress. Please note that your tracking number will be used "
-                "as your Reference Number to track progress and verify the "
-                "authenticity of your documents."
-            )
 
-            html_content = render_to_string('accounts/email_template.html', {
-                'name': instance.first_name,
-                'body_text': body_text,
-                'tracking_number': instance.tracking_id,
-                'action_url': action_url,
-                'action_text': 'Track Application',
-                'footer_note': (
-                    "In case you need assistance, contact us at "
-                    "info@eujimsolutions.com or +254 718099959."
-                )
-            })
+# --- RESUMABLE UPLOADS (protocol in accounts.uploads) ---
 
-            email = EmailMultiAlternatives(
-                subject=f"Application Received - Ref: {instance.tracking_id}",
-                body=strip_tags(html_content),
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[instance.email]
-            )
-            email.attach_alternative(html_content, "text/html")
-            email.send(fail_silently=True)
+@require_POST
+def start_upload(request):
+    """Opens a chunked upload for one application document; answers with its id and chunk size"""
+    size = request.POST.get('size', '')
+    if not size.isdigit():
+        return JsonResponse({'error': "The file size is missing."}, status=400)
+    try:
+        session = uploads.start_session(request.POST.get('field'), request.POST.get('filename'), int(size))
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse(uploads.state(session), status=201)
 
-            return redirect(
-                'application_success',
-                application_number=instance.tracking_id
-            )
-    else:
-        form = AttacheeForm()
-    return render(request, 'accounts/add_attachee.html', {'form': form})
+
+@require_GET
+def upload_status(request, upload_id):
+    """The offset query: how much of an upload arrived, so only the missing chunks are re-sent"""
+    session = get_object_or_404(UploadSession, pk=upload_id)
+    return JsonResponse(uploads.state(session))
+
+
+@require_http_methods(['PUT', 'POST'])
+def upload_chunk(request, upload_id, index):
+    """Receives the raw bytes of chunk number `index`"""
+    session = get_object_or_404(UploadSession, pk=upload_id)
+    # Never read more than one chunk's worth of body
+    data = request.read(session.chunk_size + 1)
+    try:
+        session = uploads.write_chunk(session, index, data)
+    except uploads.ChunkOutOfOrder as exc:
+        return JsonResponse({'error': str(exc), **uploads.state(session)}, status=409)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc), **uploads.state(session)}, status=400)
+    return JsonResponse(uploads.state(session))
+
+
+def _queue_received_email(request, instance):
+    """Application Received Email"""
+    action_url = request.build_absolute_uri('/check-status/')
+    body_text = (
+        "Your application has been well received and is currently in "
+        "progress. Please note that your tracking number will be used "
+        "as your Reference Number to track progress and verify the "
+        "authenticity of your documents."
+    )
+
+    html_content = render_to_string('accounts/email_template.html', {
+        'name': instance.first_name,
+        'body_text': body_text,
+        'tracking_number': instance.tracking_id,
+        'action_url': action_url,
+        'action_text': 'Track Application',
+        'footer_note': (
+            "In case you need assistance, contact us at "
+            "info@eujimsolutions.com or +254 718099959."
+        )
+    })
+
+    queue_email(
+        subject=f"Application Received - Ref: {instance.tracking_id}",
+        html_content=html_content,
+        to=[instance.email]
+    )
 
 
 def application_success(request, application_number):
@@ -89,11 +166,7 @@ def check_status(request):
     attachee = None
     if request.method == 'POST':
         query = request.POST.get('search_query', '').strip()
-        attachee = Attachee.objects.filter(
-            Q(tracking_id__iexact=query) |
-            Q(email__iexact=query) |
-            Q(national_id_number__iexact=query)
-        ).first()
+        attachee = Attachee.lookup(query)
         if attachee:
             today = timezone.now().date()
             attachee.is_expired = attachee.end_date < today
@@ -102,36 +175,41 @@ def check_status(request):
 
 @user_passes_test(is_admin, login_url='home')
 def export_attachees(request):
-    """Generates a CSV of the current filtered list"""
-    status_filter = request.GET.get('status', '')
-    search_query = request.GET.get('q', '')
-
-    attachees = Attachee.objects.all()
-    if search_query:
-        attachees = attachees.filter(
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query) |
-            Q(tracking_id__icontains=search_query)
-        )
-    if status_filter:
-        attachees = attachees.filter(status=status_filter)
+    """Streams a CSV of the current filtered list"""
+    attachees = filtered_attachees(
+        request.GET.get('status', ''), request.GET.get('q', '')
+    )
 
-    response = HttpResponse(content_type='text/csv')
+    response = StreamingHttpResponse(iter_csv_rows(attachees), content_type='text/csv')
     dt_str = timezone.now().date()
     response['Content-Disposition'] = f'attachment; filename="Exp_{dt_str}.csv"'
+    return response
 
-    writer = csv.writer(response)
-    writer.writerow([
-        'Reference No.', 'First Name', 'Last Name', 'Email',
-        'Phone', 'Institution', 'Status', 'Applied On'
-    ])
-
-    for a in attachees:
-        writer.writerow([
-            a.tracking_id, a.first_name, a.last_name, a.email,
-            a.phone, a.institution, a.status, a.created_at
-        ])
 
+@user_passes_test(is_admin, login_url='home')
+def download_bundle(request, attachee_id=None):
+    """Streams a ZIP of uploaded documents: one attachee, the ticked rows, or the filtered list.
+
+    letters=1 adds the generated letters of each attachee's current stage.
+    """
+    params = request.POST if request.method == 'POST' else request.GET
+    if attachee_id is not None:
+        attachee = get_object_or_404(Attachee, id=attachee_id)
+        attachees = Attachee.objects.filter(pk=attachee.pk)
+        filename = f"{attachee.tracking_id}_documents.zip"
+    else:
+        ids = [pk for pk in params.getlist('selected') if pk.isdigit()]
+        if ids:
+            attachees = Attachee.objects.filter(pk__in=ids)
+        else:
+            # 'status' on the bulk form is the decision to apply, so the list filter has its own name
+            attachees = filtered_attachees(params.get('filter_status', ''), params.get('q', ''))
+        filename = f"Documents_{timezone.now().date()}.zip"
+
+    response = StreamingHttpResponse(
+        iter_bundle(attachees, include_letters=params.get('letters') == '1'), content_type='application/zip'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
     return response
 
 
@@ -144,28 +222,76 @@ def import_attachees(request):
             messages.error(request, 'Please upload a valid CSV file.')
             return redirect('dashboard')
 
+        upsert = request.POST.get('mode') == 'upsert'
+        if csv_file.size > IMPORT_INLINE_MAX_BYTES:
+            # Large files would outlive the request; the run_jobs worker takes them
+            job = queue_job('import', request.user, {'upsert': upsert}, input_file=csv_file)
+            messages.info(request, f'Large file queued as import job #{job.pk}. Progress is shown below.')
+            return redirect('dashboard')
+
         try:
-            file_data = csv_file.read().decode("utf-8")
-            lines = file_data.split("\n")
-
-            for line in lines[1:]:
-                fields = line.split(",")
-                if len(fields) >= 6:
-                    Attachee.objects.create(
-                        first_name=fields[1].strip(),
-                        last_name=fields[2].strip(),
-                        email=fields[3].strip(),
-                        phone=fields[4].strip(),
-                        institution=fields[5].strip(),
-                        status='Pending'
-                    )
-            messages.success(request, 'Data imported successfully.')
+            # mode=upsert updates matching attachees instead of rejecting them
+            report = import_csv(csv_file, upsert=upsert)
         except Exception as e:
             messages.error(request, f'Error processing file: {e}')
+            return redirect('dashboard')
+
+        if report.created or report.updated or report.unchanged:
+            messages.success(request, f'Data imported successfully. {report.summary()}')
+        else:
+            messages.warning(request, report.summary())
+        # Per-row report (first few lines; the import_csv command prints all of them)
+        for line, error in report.errors[:IMPORT_ERRORS_SHOWN]:
+            messages.error(request, f'Line {line}: {error}')
+        if len(report.errors) > IMPORT_ERRORS_SHOWN:
+            messages.error(request, f'...and {len(report.errors) - IMPORT_ERRORS_SHOWN} more problem(s).')
 
     return redirect('dashboard')
 
 
+@user_passes_test(is_admin, login_url='home')
+def queue_export(request):
+    """Queues the current filtered list as a background CSV export"""
+    if request.method == 'POST':
+        job = queue_job('export', request.user, {
+            'status': request.POST.get('status', ''),
+            'q': request.POST.get('q', ''),
+        })
+        messages.info(request, f'Export queued as job #{job.pk}. Progress is shown below.')
+    return redirect('dashboard')
+
+
+def _job_payload(job):
+    return {
+        'id': job.pk,
+        'kind': job.get_kind_display(),
+        'status': job.status,
+        'progress': job.progress,
+        'total': job.total,
+        'percent': job.percent(),
+        'message': job.message,
+        'download_url': reverse('job_download', args=[job.pk]) if job.result_file else None,
+    }
+
+
+@user_passes_test(is_admin, login_url='home')
+def job_status(request, pk):
+    """Polled by the dashboard while a job runs"""
+    job = get_object_or_404(BackgroundJob, pk=pk)
+    return JsonResponse(_job_payload(job))
+
+
+@user_passes_test(is_admin, login_url='home')
+def job_download(request, pk):
+    job = get_object_or_404(BackgroundJob, pk=pk)
+    if not job.result_file:
+        raise Http404("This job has no file to download.")
+    return FileResponse(
+        job.result_file.open('rb'), as_attachment=True,
+        filename=os.path.basename(job.result_file.name)
+    )
+
+
 @user_passes_test(is_admin, login_url='home')
 def dashboard(request):
     """Enhanced Dashboard handling Export, Clickable Stages, Search, and Scalable Rows"""
@@ -180,40 +306,67 @@ def dashboard(request):
     except ValueError:
         rows_per_page = 5
 
-    attachees_list = Attachee.objects.all().order_by('-created_at')
+    attachees_list = Attachee.objects.all().order_by('-created_at', '-id')
 
     if search_query:
-        attachees_list = attachees_list.filter(
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query) |
-            Q(tracking_id__icontains=search_query) |
-            Q(email__icontains=search_query)
-        )
+        attachees_list = search_attachees(attachees_list, search_query)
 
     if status_filter and status_filter != '':
         attachees_list = attachees_list.filter(status=status_filter)
 
-    paginator = Paginator(attachees_list, rows_per_page)
+    # Stage cards: one read of the maintained counter table
+    counts = StatusCounter.snapshot()
+
     page_number = request.GET.get('page')
-    attachees = paginator.get_page(page_number)
+    if page_number:
+        # Legacy ?page=N links keep working through the OFFSET paginator
+        paginator = Paginator(attachees_list, rows_per_page)
+        attachees = paginator.get_page(page_number)
+        result_count = paginator.count
+    else:
+        # Default: keyset pages seek on (created_at, id) and never COUNT
+        attachees = keyset_page(
+            attachees_list, max(1, min(rows_per_page, 100)),
+            after=request.GET.get('after'), before=request.GET.get('before')
+        )
+        result_count = _dashboard_result_count(counts, attachees_list, status_filter, search_query)
 
     return render(request, 'accounts/dashboard.html', {
         'attachees': attachees,
-        'total': Attachee.objects.count(),
-        'pending': Attachee.objects.filter(status='Pending').count(),
-        'approved': Attachee.objects.filter(status='Approved').count(),
-        'in_progress': Attachee.objects.filter(status='In-Progress').count(),
-        'rejected': Attachee.objects.filter(status='Rejected').count(),
-        'completed': Attachee.objects.filter(status='Completed').count(),
+        'total': counts['total'],
+        'pending': counts['Pending'],
+        'approved': counts['Approved'],
+        'in_progress': counts['In-Progress'],
+        'rejected': counts['Rejected'],
+        'completed': counts['Completed'],
         'query': search_query,
         'status_filter': status_filter,
         'rows': rows_per_page,
+        'result_count': result_count,
+        'jobs': BackgroundJob.objects.filter(created_by=request.user).order_by('-created_at')[:5],
     })
 
 
+def _dashboard_result_count(counts, queryset, status_filter, search_query):
+    """Row count for the listing without a COUNT per page view.
+
+    Unsearched listings read the stage counters; searches are counted once
+    and cached briefly per (status, query).
+    """
+    if not search_query:
+        return counts.get(status_filter, 0) if status_filter else counts['total']
+    key = 'dashboard-count:' + hashlib.sha1(f"{status_filter}|{search_query}".encode()).hexdigest()
+    return cache.get_or_set(key, queryset.count, DASHBOARD_COUNT_CACHE_SECONDS)
+
+
 @user_passes_test(is_admin, login_url='home')
+@transaction.atomic
 def update_status(request, pk):
-    """Detailed Email Messaging for Approvals and admittance"""
+    """Detailed Email Messaging for Approvals and admittance.
+
+    The status change and its notification are committed together; the
+    send_queued_mail worker delivers the message outside the request.
+    """
     if request.method == "POST":
         attachee = get_object_or_404(Attachee, pk=pk)
         old_status = attachee.status
@@ -230,53 +383,8 @@ def update_status(request, pk):
 
             if old_status != new_status:
                 action_url = request.build_absolute_uri('/check-status/')
-
-                status_map = {
-                    'Approved': (
-                        "Congratulations! Your application has been APPROVED. "
-                        "We expect total discipline during your tenure.",
-                        "Get Gate Pass"
-                    ),
-                    'In-Progress': (
-                        f"You have started your attachment. Your tenure is "
-                        f"from {attachee.start_date.strftime('%d %b %Y')} to "
-                        f"{attachee.end_date.strftime('%d %b %Y')}. You can "
-                        "now download your official Attachment ID card.",
-                        "Download ID Card"
-                    ),
-                    'Rejected': (
-                        "We regret to inform you that your application was "
-                        "not successful at this time.",
-                        "Check Status"
-                    ),
-                    'Completed': (
-                        "Your attachment period is now COMPLETED. We wish you "
-                        "the very best in your future endeavors.",
-                        "Get Documents"
-                    )
-                }
-
-                if new_status in status_map:
-                    body_text, btn_label = status_map[new_status]
-                    html_content = render_to_string(
-                        'accounts/email_template.html', {
-                            'name': attachee.first_name,
-                            'body_text': body_text,
-                            'tracking_number': attachee.tracking_id,
-                            'action_url': action_url,
-                            'action_text': btn_label,
-                            'footer_note': "Contact info@eujimsolutions.com"
-                        }
-                    )
-
-                    email = EmailMultiAlternatives(
-                        subject=f"Update - Ref: {attachee.tracking_id}",
-                        body=strip_tags(html_content),
-                        from_email=settings.DEFAULT_FROM_EMAIL,
-                        to=[attachee.email]
-                    )
-                    email.attach_alternative(html_content, "text/html")
-                    email.send(fail_silently=True)
+                queue_status_emails([attachee], new_status, action_url)
+                queue_prerender([attachee], new_status)
 
             messages.success(
                 request,
@@ -285,364 +393,117 @@ def update_status(request, pk):
     return redirect('dashboard')
 
 
-# --- PDF BRANDING & UTILITY FUNCTIONS ---
-
-def draw_header_and_border(p):
-    """Sharp letterhead placement with double-line brand borders"""
-    brand_color = (85/255, 212/255, 122/255)
-    p.setStrokeColorRGB(*brand_color)
-    p.setLineWidth(3)
-    p.rect(0.4*inch, 0.4*inch, 7.5*inch, 10.9*inch)
-    p.setLineWidth(1)
-    p.rect(0.45*inch, 0.45*inch, 7.4*inch, 10.8*inch)
-    p.setFillColorRGB(0, 0, 0)
+@user_passes_test(is_admin, login_url='home')
+def bulk_update_status(request):
+    """Applies one decision to every attachee ticked on the dashboard"""
+    if request.method == "POST":
+        new_status = request.POST.get('status')
+        ids = [pk for pk in request.POST.getlist('selected') if pk.isdigit()]
 
-    l_path = os.path.join(settings.BASE_DIR, 'static/images/letterhead.png')
+        if new_status not in dict(Attachee.STATUS_CHOICES):
+            messages.error(request, "Choose a valid status for the selected applicants.")
+        elif not ids:
+            messages.error(request, "No applicants were selected.")
+        else:
+            action_url = request.build_absolute_uri('/check-status/')
+            changed = bulk_transition(ids, new_status, action_url)
+            messages.success(
+                request,
+                f"{len(changed)} applicant(s) moved to {new_status}."
+            )
+    # Return to the same filtered dashboard view the selection was made from
+    next_url = request.POST.get('next', '')
+    if url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+        return redirect(next_url)
+    return redirect('dashboard')
 
-    if os.path.exists(l_path):
-        bh = 1.3 * inch
-        p.drawImage(
-            l_path, 0.5*inch, A4[1] - bh - 0.5*inch, width=7.27*inch,
-            height=bh, mask='auto', preserveAspectRatio=True
-        )
-    else:
-        p.setFillColorRGB(0.1, 0.1, 0.1)
-        p.setFont("Helvetica-Bold", 14)
-        p.drawCentredString(4.15*inch, 10.2*inch, "EUJIM SOLUTIONS LIMITED")
-        p.setFont("Helvetica", 9)
-        p.drawCentredString(4.15*inch, 10.05*inch, "Gesora Road, Utawala")
-        p.setFillColorRGB(0, 0, 0)
-
-
-def draw_footer(p, attachee, current_y):
-    """Standardized professional footer with clear spacing and no overlaps"""
-    # 1. SETTING THE BASE: Higher base to prevent border overlap
-    footer_y = max(current_y - 0.5*inch, 2.8*inch)
-    left_margin = 0.8*inch
-    
-    # 2. SIGN-OFF: Standard "Yours sincerely"
-    p.setFont("Helvetica", 10)
-    p.drawString(left_margin, footer_y + 0.8*inch, "Yours sincerely,")
-
-    # 3. SIGNATURE IMAGE: Positioned clearly below sign-off
-    s_path = os.path.join(settings.BASE_DIR, 'static/images/signature.png')
-    if os.path.exists(s_path):
-        p.drawImage(
-            s_path, left_margin, footer_y + 0.25*inch, width=1.3*inch,
-            preserveAspectRatio=True, mask='auto'
-        )
 
-    # 4. NAME AND TITLE: Anchored on the left
-    p.setFont("Helvetica-Bold", 10)
-    p.drawString(left_margin, footer_y - 0.05*inch, "Ombwayo Michael")
-    p.setFont("Helvetica", 9)
-    p.drawString(left_margin, footer_y - 0.2*inch, "CEO, Eujim Solutions Limited")
+@user_passes_test(is_admin, login_url='home')
+def protected_media(request, path):
+    """Attachee uploads (IDs, CVs, contracts) for admins only.
 
-    # 5. OFFICIAL STAMP: Pushed right to avoid overlapping the signature/title
-    stamp_x, stamp_y = 3.3*inch, footer_y - 0.7*inch
-    s_w, s_h = 2.4*inch, 1.3*inch 
+    The bytes are sent by the front web server when MEDIA_SENDFILE_BACKEND
+    is set, otherwise streamed here with Range and revalidation support.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404("File not found.")
+    # Judge the resolved path, so docs/../.media_gc/ cannot reach the quarantine
+    top = os.path.relpath(full_path, settings.MEDIA_ROOT).split(os.sep)[0]
+    if top == MEDIA_GC_DIR or not os.path.isfile(full_path):
+        raise Http404("File not found.")
+    response = serve_file(request, full_path, as_attachment=request.GET.get('download') == '1')
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
-    p.setStrokeColorRGB(0.2, 0.4, 0.7) # Branded Blue
-    p.setLineWidth(1.5)
-    p.rect(stamp_x, stamp_y, s_w, s_h, stroke=1, fill=0)
-    
-    p.setFillColorRGB(0.2, 0.4, 0.7)
-    p.setFont("Helvetica-Bold", 8.5)
-    p.drawCentredString(stamp_x + 1.2*inch, stamp_y + 1.1*inch, "EUJIM SOLUTIONS LIMITED")
-
-    p.setFont("Helvetica-Bold", 7.5)
-    p.drawCentredString(stamp_x + 1.2*inch, stamp_y + 0.95*inch, "P.O. BOX 7034-00200 NAIROBI")
-
-    # Verification Date in Red inside the stamp
-    p.setFillColorRGB(0.8, 0.1, 0.1)
-    p.setFont("Helvetica-Bold", 10)
-    dt_txt = (
-        attachee.completion_date.strftime('%d %b %Y').upper()
-        if attachee.completion_date
-        else timezone.now().strftime('%d %b %Y').upper()
-    )
-    p.drawCentredString(stamp_x + 1.2*inch, stamp_y + 0.65*inch, dt_txt)
 
-    p.setFillColorRGB(0.2, 0.4, 0.7)
-    p.setFont("Helvetica-Bold", 7.5) 
-    p.drawCentredString(stamp_x + 1.2*inch, stamp_y + 0.4*inch, "Email: info@eujimsolutions.com")
-    p.drawCentredString(stamp_x + 1.2*inch, stamp_y + 0.2*inch, "TEL: 0113281424/0718099959")
+def verify_document(request, token):
+    """Public page behind the QR code on letters and ID cards.
 
-    # 6. QR CODE: Isolated on the far right for verification
-    qr = qrcode.make(f"VERIFIED REF: {attachee.tracking_id}")
-    qb = io.BytesIO()
-    qr.save(qb, format='PNG')
-    qb.seek(0)
-    p.drawImage(ImageReader(qb), 6.5*inch, footer_y - 0.6*inch, width=1.0*inch, height=1.0*inch)
+    Forged tokens are rejected on the signature alone, and genuine ones are
+    answered from the cache, so a wave of scans costs at most one query
+    per attachee every few minutes.
+    """
+    tracking_id = check_token(token)
+    record = verified_record(tracking_id) if tracking_id else None
+    status = 200 if record else 404
 
+    if request.GET.get('format') == 'json' or 'application/json' in request.headers.get('Accept', ''):
+        response = JsonResponse({'valid': bool(record), **(record or {})}, status=status)
+    else:
+        response = render(request, 'accounts/verify.html', {'record': record}, status=status)
+    if record:
+        patch_cache_control(response, public=True, max_age=VERIFY_CACHE_SECONDS)
+    return response
 
-def download_completion_letter(request, attachee_id):
-    attachee = get_object_or_404(Attachee, id=attachee_id)
 
-    is_male = attachee.gender.lower() == 'male'
-    subj = "He" if is_male else "She"
-    poss = "his" if is_male else "her"
-    obj = "him" if is_male else "her"
+# --- BRANDED DOCUMENT DOWNLOADS (layouts live in accounts.documents) ---
 
-    duration_days = (attachee.end_date - attachee.start_date).days
-    duration_weeks = duration_days // 7
+def _document_response(request, kind, attachee_id):
+    """Serves a generated PDF.
 
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    draw_header_and_border(p)
+    Stage documents come from media storage (pre-rendered when the status
+    changed) and can be revalidated with their ETag; anything else is built
+    through the render cache on first request.
+    """
+    attachee = get_object_or_404(Attachee, id=attachee_id)
+    doc = current_document(attachee, kind)
+    if doc is None:
+        return FileResponse(
+            open_document(kind, attachee), as_attachment=False,
+            content_type='application/pdf', filename=document_filename(kind, attachee)
+        )
 
-    y_title, y_start = 9.2*inch, 8.9*inch
-    
-    # Header Info
-    p.setFont("Helvetica", 11)
-    p.drawString(0.8*inch, y_start, f"Date: {timezone.now().strftime('%d %b %Y')}")
-    p.drawString(0.8*inch, y_start - 0.2*inch, f"Ref: {attachee.tracking_id}")
-
-    # Formal Title
-    p.setFont("Helvetica-Bold", 16)
-    p.drawCentredString(4.15*inch, y_title, "CERTIFICATE OF COMPLETION")
-
-    p.setFont("Helvetica-Bold", 11)
-    p.drawString(0.8*inch, y_start - 0.6*inch, "TO WHOM IT MAY CONCERN,")
-
-    p.setFont("Helvetica", 11)
-    full_name = f"{attachee.first_name.upper()} {attachee.last_name.upper()}"
-
-    paras = [
-        (
-            f"This is to certify that {full_name}, a student from {attachee.institution}, "
-            f"has successfully fulfilled all the requirements for the Industrial Attachment "
-            f"program at EUJIM SOLUTIONS LIMITED. The candidate was engaged for a "
-            f"rigorous period of {duration_weeks} weeks, effective from "
-            f"{attachee.start_date.strftime('%d %b %Y')} to {attachee.end_date.strftime('%d %b %Y')}."
-        ),
-        (
-            f"Throughout the attachment, EUJIM SOLUTIONS LIMITED provided a structured mentorship "
-            f"environment designed to bridge the gap between academic theory and industry reality. "
-            f"Under our technical guidance, {attachee.first_name} underwent comprehensive training "
-            f"in Hard Skills, including specialized hands-on experience in Software Development "
-            f"(full-stack logic), ICT Consultancy, and Web Design. Simultaneously, we focused on "
-            f"refining the candidate’s Soft Skills, specifically training {obj} in agile teamwork, "
-            f"professional communication, and critical problem-solving within a high-pressure development environment."
-        ),
-        (
-            f"By virtue of this successful completion, {attachee.first_name} is hereby "
-            f"recognized for {poss} technical competence, adaptability, and professionalism. "
-            f"The candidate's performance met the required industry standards, demonstrating "
-            f"significant growth and full preparedness for future professional roles in the "
-            f"global technology sector. For any inquiries regarding this certification, "
-            f"please contact info@eujimsolutions.com."
+    etag = quote_etag(doc.fingerprint)
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(
+            doc.file.open('rb'), as_attachment=False,
+            content_type='application/pdf', filename=document_filename(kind, attachee)
         )
-    ]
-
-    y = y_start - 1.1*inch
-    for txt in paras:
-        to = p.beginText(0.8*inch, y)
-        to.setLeading(14)
-        wrapped = textwrap.wrap(txt, width=90)
-        for line in wrapped:
-            to.textLine(line)
-        p.drawText(to)
-        y -= (len(wrapped) * 14) + 25
-
-    draw_footer(p, attachee, y - 0.2*inch)
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-    return FileResponse(
-        buffer, as_attachment=False, content_type='application/pdf',
-        filename=f'Completion_{attachee.tracking_id}.pdf'
-    )
+        response['Last-Modified'] = http_date(doc.rendered_at.timestamp())
+    response['ETag'] = etag
+    # The file changes whenever the attachee's details do, so always revalidate
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
 
-def download_recommendation_letter(request, attachee_id):
-    attachee = get_object_or_404(Attachee, id=attachee_id)
+def download_completion_letter(request, attachee_id):
+    return _document_response(request, 'completion', attachee_id)
 
-    is_male = attachee.gender.lower() == 'male'
-    subj = "He" if is_male else "She"
-    poss = "his" if is_male else "her"
-    obj = "him" if is_male else "her"
-
-    duration_days = (attachee.end_date - attachee.start_date).days
-    duration_weeks = duration_days // 7
-
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    draw_header_and_border(p)
-
-    y_title, y_start = 9.2*inch, 8.9*inch
-    p.setFont("Helvetica-Bold", 13)
-    p.drawCentredString(4.15*inch, y_title, "RECOMMENDATION LETTER")
-
-    p.setFont("Helvetica", 11)
-    p.drawString(0.8*inch, y_start, f"Date: {timezone.now().strftime('%d %b %Y')}")
-    p.drawString(0.8*inch, y_start - 0.2*inch, f"Ref: {attachee.tracking_id}")
-
-    p.setFont("Helvetica-Bold", 11)
-    p.drawString(0.8*inch, y_start - 0.6*inch, "TO WHOM IT MAY CONCERN,")
-
-    p.setFont("Helvetica", 11)
-    full_name = f"{attachee.first_name.upper()} {attachee.last_name.upper()}"
-
-    paras = [
-        (
-            f"It is a pleasure to recommend {full_name} for professional roles. "
-            f"{subj} completed a rigorous {duration_weeks}-week industrial "
-            f"attachment at EUJIM SOLUTIONS where {subj.lower()} made a lasting "
-            f"impression under Reference No: {attachee.tracking_id}. During "
-            f"{poss} time with us, {attachee.first_name} demonstrated "
-            f"exceptional skills, dedication, and a passion for learning."
-        ),
-        (
-            f"As an attachee, {attachee.first_name} worked closely with our "
-            f"teams in software development, digital marketing, web design, "
-            f"and ICT consultancy. {subj} showed a remarkable ability to "
-            f"quickly adapt to new tasks and responsibilities, collaborating "
-            f"effectively with colleagues and making significant contributions "
-            f"to various projects. Throughout the attachment, {subj.lower()} "
-            f"demonstrated a strong work ethic, a willingness to learn, and "
-            f"a commitment to delivering high-quality results."
-        ),
-        (
-            f"I highly recommend {full_name} for any future opportunities. "
-            f"{subj} has the skills, knowledge, and attitude necessary to "
-            f"excel in {poss} chosen career path. If you have any further "
-            f"questions, please do not hesitate to contact us through our "
-            f"email info@eujimsolutions.com or call us at 0113281424."
-        )
-    ]
-
-    y = y_start - 1.0*inch
-    for txt in paras:
-        to = p.beginText(0.8*inch, y)
-        to.setLeading(14)
-        wrapped = textwrap.wrap(txt, width=90)
-        for line in wrapped:
-            to.textLine(line)
-        p.drawText(to)
-        y -= (len(wrapped) * 14) + 20
-
-    draw_footer(p, attachee, y - 0.2*inch)
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-    return FileResponse(
-        buffer, as_attachment=False, content_type='application/pdf',
-        filename=f'Recommendation_{attachee.tracking_id}.pdf'
-    )
+
+def download_recommendation_letter(request, attachee_id):
+    return _document_response(request, 'recommendation', attachee_id)
 
 
 def download_gate_pass(request, attachee_id):
-    attachee = get_object_or_404(Attachee, id=attachee_id)
-    buffer = io.BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    draw_header_and_border(p)
-    
-    y_title, y_section1 = 9.2*inch, 8.7*inch
-    p.setFont("Helvetica-Bold", 15)
-    title = f"OFFICIAL GATE PASS ({attachee.tracking_id})"
-    p.drawCentredString(4.15*inch, y_title, title)
-    
-    # Section 1: APPLICANT DETAILS
-    p.setFont("Helvetica-Bold", 12)
-    p.drawString(1.0*inch, y_section1, "APPLICANT DETAILS")
-    p.line(1.0*inch, y_section1 - 0.05*inch, 3.2*inch, y_section1 - 0.05*inch)
-    
-    p.setFont("Helvetica", 11)
-    details = [
-        f"Full Name: {attachee.first_name} {attachee.last_name}",
-        f"Phone Number: {attachee.phone}",
-        f"National ID: {attachee.national_id_number}",
-        f"Gender: {attachee.gender}",
-        f"Institution: {attachee.institution}",
-        f"Reference No: {attachee.tracking_id}",
-        f"Duration: {attachee.start_date.strftime('%d %b %Y')} to {attachee.end_date.strftime('%d %b %Y')}"
-    ]
-    
-    curr_y = y_section1 - 0.35*inch
-    for item in details:
-        p.drawString(1.0*inch, curr_y, item)
-        curr_y -= 0.22*inch 
-        
-    # Section 2: TERMS OF ENGAGEMENT
-    y_section2 = curr_y - 0.4*inch 
-    p.setFont("Helvetica-Bold", 12)
-    p.drawString(1.0*inch, y_section2, "TERMS OF ENGAGEMENT")
-    p.line(1.0*inch, y_section2 - 0.05*inch, 3.5*inch, y_section2 - 0.05*inch)
-    
-    welcome_text = (
-        f"We welcome you, {attachee.first_name}, to EUJIM SOLUTIONS LIMITED. "
-        "During the stated period, you will be integrated into our professional team. "
-        "You are required to report to the office from Monday to Friday, between "
-        "9:00 AM and 4:00 PM. Please maintain high levels of discipline and "
-        "adhere to all company policies throughout your industrial attachment."
-    )
-    
-    p.setFont("Helvetica", 11)
-    to = p.beginText(1.0*inch, y_section2 - 0.35*inch)
-    to.setLeading(16) 
-    wrapped = textwrap.wrap(welcome_text, width=85)
-    for line in wrapped:
-        to.textLine(line)
-    p.drawText(to)
-    
-    draw_footer(p, attachee, y_section2 - 2.5*inch)
-    
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-    return FileResponse(
-        buffer, as_attachment=False, content_type='application/pdf',
-        filename=f'Pass_{attachee.tracking_id}.pdf'
-    )
+    return _document_response(request, 'gate_pass', attachee_id)
 
 
 def download_id_card(request, attachee_id):
-    attachee = get_object_or_404(Attachee, id=attachee_id)
-    buffer = io.BytesIO()
-    id_size = (3.375 * inch, 2.125 * inch)
-    p = canvas.Canvas(buffer, pagesize=id_size)
-    brand_color = (85/255, 212/255, 122/255)
-    p.setFillColorRGB(*brand_color)
-    p.rect(0, 1.6*inch, 3.375*inch, 0.525*inch, fill=1)
-    p.setFillColorRGB(1, 1, 1)
-    p.setFont("Helvetica-Bold", 10)
-    p.drawCentredString(1.68*inch, 1.8*inch, "EUJIM SOLUTIONS LTD")
-    p.setFillColorRGB(0, 0, 0)
-    p.setFont("Helvetica-Bold", 9)
-    name_str = f"{attachee.first_name} {attachee.last_name}"
-    p.drawCentredString(1.68*inch, 1.4*inch, name_str)
-    p.setFont("Helvetica", 7)
-
-    p.drawString(0.2*inch, 1.15*inch, f"ID NO: {attachee.national_id_number}")
-    p.drawString(0.2*inch, 1.0*inch, f"PHONE: {attachee.phone}")
-    p.drawString(0.2*inch, 0.85*inch, f"EMAIL: {attachee.email}")
-    p.drawString(0.2*inch, 0.7*inch, f"REF NO: {attachee.tracking_id}")
-    p.drawString(0.2*inch, 0.55*inch, f"INST: {attachee.institution}")
-
-    p.setFillColorRGB(0.8, 0.1, 0.1)
-    p.setFont("Helvetica-Bold", 6.5)
-    valid_text = (
-        f"VALID: {attachee.start_date.strftime('%b %Y')} - "
-        f"{attachee.end_date.strftime('%b %Y')}"
-    )
-    p.drawCentredString(1.68*inch, 0.3*inch, valid_text)
-
-    qr_data = f"REF:{attachee.tracking_id} | {attachee.first_name}"
-    qr = qrcode.make(qr_data)
-    qb = io.BytesIO()
-    qr.save(qb, format='PNG')
-    qb.seek(0)
-    p.drawImage(
-        ImageReader(qb), 2.5*inch, 0.5*inch, width=0.7*inch, height=0.7*inch
-    )
-    p.showPage()
-    p.save()
-    buffer.seek(0)
-    return FileResponse(
-        buffer, as_attachment=False, content_type='application/pdf',
-        filename=f'ID_{attachee.tracking_id}.pdf'
-    )
+    return _document_response(request, 'id_card', attachee_id)
 
 
 @user_passes_test(is_admin, login_url='home')
@@ -87,6 +87,35 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# How protected_media hands files to the front web server: None (Django streams
+# them), 'nginx' (X-Accel-Redirect to MEDIA_ACCEL_PREFIX, which must be an
+# `internal` location aliased to MEDIA_ROOT) or 'sendfile' (Apache/lighttpd X-Sendfile)
+MEDIA_SENDFILE_BACKEND = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Generated PDF letters/ID cards (accounts.doc_cache); least recently used are evicted
+DOCUMENT_CACHE_DIR = os.path.join(BASE_DIR, 'document_cache')
+DOCUMENT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# Partly uploaded application documents (accounts.uploads); kept outside
+# MEDIA_ROOT so they are never served. `manage.py clean_uploads` expires them.
+CHUNKED_UPLOAD_DIR = os.path.join(BASE_DIR, 'upload_chunks')
+
+# Public address of the site, printed in the verification QR code of every document
+SITE_URL = 'http://localhost:8000'
+
+# Verification answers (accounts.verification) and dashboard counts are cached
+# in the default cache. Django's default LocMemCache is per process, so under
+# several workers a change only clears the cache of the worker that made it
+# and the others serve the old answer for up to 5 minutes. Deployments with
+# more than one process need a shared backend, for example:
+# CACHES = {
+#     'default': {
+#         'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#         'LOCATION': 'redis://127.0.0.1:6379',
+#     }
+# }
+
 # --- PREVIEW & SECURITY FIX ---
 # Allows the browser to show PDFs inside the Dashboard Modal frame
 X_FRAME_OPTIONS = 'SAMEORIGIN'
@@ -109,6 +138,10 @@ EMAIL_HOST_USER = 'gracegifty012@gmail.com'
 EMAIL_HOST_PASSWORD = 'hpyu xfbc jfsq nhrc' 
 DEFAULT_FROM_EMAIL = 'Eujim Solutions <gracegifty012@gmail.com>'
 
+# Outbox worker (python manage.py send_queued_mail --loop)
+MAIL_OUTBOX_MAX_ATTEMPTS = 6          # attempts before a message is dead-lettered
+MAIL_OUTBOX_BACKOFF_SECONDS = 60      # first retry delay, doubled per attempt
+
 # Zoho Email Settings (Commented out as backup)
 # EMAIL_HOST = 'smtppro.zoho.com'
 # EMAIL_HOST_USER = 'info@eujimsolutions.com'
@@ -8,8 +8,7 @@ urlpatterns = [
     path('', include('accounts.urls')),
 ]
 
-# This ensures BOTH the Logo/Contract (Static) and Student Uploads (Media) load
-# Standard practice for local development to serve uploaded files and branding images
+# Branding images for local development. Student uploads are personal documents
+# and are only served through accounts.views.protected_media, never as /media/.
 if settings.DEBUG:
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file